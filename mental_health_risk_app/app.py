@@ -1,24 +1,27 @@
 import hashlib
-from datetime import datetime
+import time
+from datetime import datetime, timezone
 
-import joblib
 import numpy as np
 import pandas as pd
 import streamlit as st
-from transformers import AutoModelForSequenceClassification, AutoTokenizer
 
-from src.analysis import monitor_drift
+from src.cascade import CascadeResult, CascadeStats, escalation_mask, get_cascade_band
 from src.config import (
     BASELINE_MODEL_PATH,
     LABEL_COLUMN,
-    LOG_DIR,
-    PREDICTION_LOG_PATH,
+    RISK_ALERT_THRESHOLD,
     TEXT_COLUMN,
-    TRANSFORMER_DIR,
     USER_ID_COLUMN,
 )
-from src.modeling import prepare_features
+from src.drift import drift_columns, monitor_drift
+from src.explain import get_explainer
+from src.modeling import at_risk_probability, class_probabilities, prepare_feature_blocks
+from src.prediction_log import get_prediction_logger
 from src.preprocess import preprocess_frame
+from src.registry import REGISTRY, get_baseline, get_transformer
+from src.transformer_backends import BACKENDS, ONNX_MODEL_FILES, backend_artifacts
+from src.user_state import get_user_store
 
 st.set_page_config(page_title="Mental Health Risk Estimator", layout="wide")
 st.title("NLP-based Mental Health Risk Prediction (Local Inference)")
@@ -27,20 +30,61 @@ st.warning(
     "If someone may be in immediate danger, contact local emergency services or a licensed mental health professional."
 )
 
-model_choice = st.sidebar.selectbox("Model", ["Baseline TF-IDF", "Transformer"])
-confidence_threshold = st.sidebar.slider("Risk alert threshold", 0.5, 0.95, 0.7, 0.01)
+model_choice = st.sidebar.selectbox("Model", ["Baseline TF-IDF", "Transformer", "Cascade"])
+backend = st.sidebar.selectbox("Transformer backend", BACKENDS, disabled=model_choice == "Baseline TF-IDF")
+confidence_threshold = st.sidebar.slider("Risk alert threshold", 0.5, 0.95, RISK_ALERT_THRESHOLD, 0.01)
+calibrated_band = get_cascade_band()
+cascade_band = st.sidebar.slider(
+    "Cascade uncertainty band",
+    0.0,
+    0.5,
+    float(calibrated_band["band"]),
+    0.005,
+    disabled=model_choice != "Cascade",
+    help="Baseline confidences within this distance of the alert threshold are rescored by the transformer.",
+)
 
 user_id = st.text_input("User ID (optional)", "anonymous")
 text = st.text_area("Enter a journal entry or social post", height=220)
 
 
 def secure_log(entry: dict):
-    LOG_DIR.mkdir(parents=True, exist_ok=True)
-    row = pd.DataFrame([entry])
-    if PREDICTION_LOG_PATH.exists():
-        row.to_csv(PREDICTION_LOG_PATH, mode="a", header=False, index=False)
-    else:
-        row.to_csv(PREDICTION_LOG_PATH, index=False)
+    get_prediction_logger().log(entry)
+
+
+def predict_baseline_text(frame: pd.DataFrame, text: str):
+    if not BASELINE_MODEL_PATH.exists():
+        st.error("Baseline model artifacts not found. Run training script first.")
+        st.stop()
+    model, vectorizer = get_baseline()
+    features = prepare_feature_blocks(frame, vectorizer, fit=False)
+    probs = class_probabilities(model, features)
+    pred = model.classes_[probs[0].argmax()]
+    risk = float(at_risk_probability(probs, model.classes_)[0])
+    top_terms = get_explainer().explain_text(text, pred, features.tocsr)
+    return pred, float(probs[0].max()), risk, features, ", ".join(f"{t}:{s:+.2f}" for t, s in top_terms)
+
+
+def predict_transformer_text(text: str):
+    if not all(path.exists() for path in backend_artifacts(backend)):
+        st.error(
+            "Transformer artifacts not found. Run fine-tuning first"
+            + (" and export with train.py --export-onnx." if backend in ONNX_MODEL_FILES else ".")
+        )
+        st.stop()
+    tokenizer, model = get_transformer(backend)
+    inputs = tokenizer(text, return_tensors="pt", truncation=True, padding=True)
+    output = model(**inputs, output_attentions=True)
+    probs = output.logits.softmax(dim=-1).detach().numpy()[0]
+    label_idx = int(np.argmax(probs))
+    classes = [model.config.id2label[i] for i in range(len(probs))]
+    risk = float(at_risk_probability(probs[None, :], classes)[0])
+    if not output.attentions:
+        return model.config.id2label[label_idx], float(probs[label_idx]), risk, "N/A for ONNX backend"
+    attention = output.attentions[-1].mean(dim=1).detach().numpy()[0]
+    tokens = tokenizer.convert_ids_to_tokens(inputs["input_ids"][0].tolist())
+    top_pairs = sorted(zip(tokens, attention[0]), key=lambda x: x[1], reverse=True)[:8]
+    return model.config.id2label[label_idx], float(probs[label_idx]), risk, ", ".join([f"{t}:{s:.2f}" for t, s in top_pairs])
 
 
 if st.button("Predict risk"):
@@ -50,59 +94,99 @@ if st.button("Predict risk"):
         frame = pd.DataFrame([{TEXT_COLUMN: text, LABEL_COLUMN: "unknown", USER_ID_COLUMN: user_id}])
         frame = preprocess_frame(frame)
 
-        if model_choice == "Baseline TF-IDF":
-            if not BASELINE_MODEL_PATH.exists():
-                st.error("Baseline model artifacts not found. Run training script first.")
-                st.stop()
-            model = joblib.load(BASELINE_MODEL_PATH)
-            vectorizer = joblib.load(BASELINE_MODEL_PATH.parent / "tfidf_vectorizer.joblib")
-            features = prepare_features(frame, vectorizer, fit=False)
-            if hasattr(model, "predict_proba"):
-                probs = model.predict_proba(features)[0]
-                score = float(np.max(probs))
-                pred = model.classes_[int(np.argmax(probs))]
-            else:
-                decision = model.decision_function(features)
-                score = float(1 / (1 + np.exp(-decision[0])))
-                pred = model.predict(features)[0]
-            drift = monitor_drift(float(features.getnnz(axis=1).mean()))
-            attention_terms = "N/A for linear model"
+        cascade_note = None
+        if model_choice == "Transformer":
+            pred, score, risk, attention_terms = predict_transformer_text(text)
+            model_name, drift_features = "transformer", None
         else:
-            if not TRANSFORMER_DIR.exists():
-                st.error("Transformer artifacts not found. Run fine-tuning first.")
-                st.stop()
-            tokenizer = AutoTokenizer.from_pretrained(str(TRANSFORMER_DIR))
-            model = AutoModelForSequenceClassification.from_pretrained(str(TRANSFORMER_DIR), output_attentions=True)
-            inputs = tokenizer(text, return_tensors="pt", truncation=True, padding=True)
-            output = model(**inputs)
-            probs = output.logits.softmax(dim=-1).detach().numpy()[0]
-            label_idx = int(np.argmax(probs))
-            pred = model.config.id2label[label_idx]
-            score = float(probs[label_idx])
-            drift = {"psi_proxy": 0.0, "alert": 0}
-            attention = output.attentions[-1].mean(dim=1).detach().numpy()[0]
-            token_ids = inputs["input_ids"][0].tolist()
-            tokens = tokenizer.convert_ids_to_tokens(token_ids)
-            token_scores = attention[0]
-            top_pairs = sorted(zip(tokens, token_scores), key=lambda x: x[1], reverse=True)[:8]
-            attention_terms = ", ".join([f"{t}:{s:.2f}" for t, s in top_pairs])
+            start = time.perf_counter()
+            pred, score, risk, drift_features, attention_terms = predict_baseline_text(frame, text)
+            model_name = "baseline"
+            if model_choice == "Cascade":
+                stats = st.session_state.setdefault("cascade_stats", CascadeStats())
+                baseline_seconds, baseline_pred = time.perf_counter() - start, pred
+                escalate = bool(escalation_mask([score], confidence_threshold, cascade_band)[0])
+                start = time.perf_counter()
+                if escalate:
+                    cascade_note = f"escalated to the transformer (baseline: {pred} at {score:.3f})"
+                    pred, score, risk, attention_terms = predict_transformer_text(text)
+                    model_name, drift_features = "transformer", None
+                else:
+                    cascade_note = "answered by the baseline"
+                stats.add(
+                    CascadeResult(
+                        predictions=np.array([pred], dtype=object),
+                        scores=np.array([score]),
+                        escalated=np.array([escalate]),
+                        baseline_predictions=np.array([baseline_pred], dtype=object),
+                        baseline_seconds=baseline_seconds,
+                        transformer_seconds=time.perf_counter() - start,
+                    )
+                )
 
+        drift_values = {name: float(values[0]) for name, values in drift_columns(frame, [score], drift_features).items()}
+        drift = monitor_drift(model_name, drift_values)
         risk_flag = int(score >= confidence_threshold)
         st.subheader("Prediction")
         st.write(f"**Class:** {pred}")
         st.write(f"**Confidence:** {score:.3f}")
+        st.write(f"**At-risk probability:** {risk:.3f}")
         st.write(f"**Risk alert:** {'Yes' if risk_flag else 'No'}")
-        st.write(f"**Drift monitor PSI proxy:** {drift['psi_proxy']:.3f} ({'alert' if drift['alert'] else 'normal'})")
+        if cascade_note:
+            st.write(f"**Cascade:** {cascade_note}")
+        st.write(
+            f"**Drift monitor PSI:** {drift['psi']:.3f} over the last {drift['window_size']} predictions"
+            + (f", largest shift in `{drift['worst_feature']}`" if drift["worst_feature"] else "")
+            + f" ({'alert' if drift['alert'] else 'normal'})"
+        )
         st.write(f"**Influential terms / attention:** {attention_terms}")
 
+        user_hash = hashlib.sha256(user_id.encode()).hexdigest()[:12]
+        now = datetime.now(timezone.utc)
+        # The rolling risk tracks the at-risk probability, not the confidence in whichever class won.
+        user_risk = get_user_store().update(user_hash, risk, now)
+        st.write(
+            f"**Rolling risk for this user:** {user_risk['risk']:.3f} ({user_risk['delta']:+.3f} vs previous, "
+            f"{user_risk['n_predictions']} predictions)"
+        )
+
         secure_log(
             {
-                "timestamp": datetime.utcnow().isoformat(),
-                "user_hash": hashlib.sha256(user_id.encode()).hexdigest()[:12],
+                "timestamp": now,
+                "user_hash": user_hash,
                 "prediction": pred,
                 "confidence": score,
                 "risk_flag": risk_flag,
-                "model": model_choice,
+                "model": model_name,
+                **{name: value for name, value in drift_values.items() if name != "score"},
             }
         )
         st.success("Prediction logged locally with hashed user identifier.")
+
+with st.sidebar.expander("Loaded models"):
+    for name, info in REGISTRY.stats().items():
+        st.write(f"**{name}**: loaded in {info['load_seconds']:.2f}s, ~{info['rss_mb']:.0f} MB resident ({info['content_hash']})")
+
+with st.sidebar.expander("Cascade"):
+    if "escalation_rate" in calibrated_band:
+        st.write(
+            f"Validation (threshold {calibrated_band['threshold']:.2f}, band {calibrated_band['band']:.3f}): "
+            f"{calibrated_band['escalation_rate']:.1%} escalated, {calibrated_band['agreement']:.1%} agreement with the "
+            f"transformer, ~{calibrated_band['latency_savings']:.0%} latency saved"
+        )
+    else:
+        st.write("Band not calibrated yet; run train.py --calibrate-cascade.")
+    if "cascade_stats" in st.session_state:
+        session = st.session_state["cascade_stats"].summary(calibrated_band.get("transformer_seconds_per_row"))
+        st.write(
+            f"This session: {session['escalated']} of {session['rows']} escalated ({session['escalation_rate']:.1%}), "
+            f"agreement on escalated {session['escalated_agreement']:.1%}"
+            + (f", ~{session['latency_savings']:.0%} latency saved" if "latency_savings" in session else "")
+        )
+
+with st.sidebar.expander("Largest risk increases (7 days)"):
+    risers = get_user_store().top_risers(days=7, limit=10)
+    if risers.empty:
+        st.write("No rising users in the last 7 days.")
+    else:
+        st.dataframe(risers, hide_index=True)
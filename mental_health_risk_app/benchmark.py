@@ -0,0 +1,338 @@
+import argparse
+import copy
+import json
+import string
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict
+
+import numpy as np
+import pandas as pd
+
+from src.analysis import shap_top_tokens
+from src.benchmarking import compare_results, environment_info, measure, measure_isolated, measure_startup, synthetic_corpus
+from src.config import BASELINE_MODEL_PATH, TEXT_COLUMN, TRANSFORMER_DIR, TRANSFORMER_MAX_LENGTH
+from src.inference import predict_transformer
+from src.incremental import train_baseline_incremental
+from src.modeling import build_tfidf_vectorizer, evaluate_model, prepare_features, train_baseline
+from src.preprocess import (
+    EMOTION_LEXICON,
+    MENTION_PATTERN,
+    URL_PATTERN,
+    WHITESPACE_PATTERN,
+    add_emotion_proxy_features,
+    clean_texts,
+    preprocess_frame,
+    split_dataset,
+)
+from src.sentiment import SENTIMENT_CACHE
+
+
+SUITE_SIZES = [10_000, 100_000, 1_000_000]
+
+
+def parse_args():
+    p = argparse.ArgumentParser(description="Performance benchmarks for the mental health risk pipeline.")
+    sub = p.add_subparsers(dest="command", required=True)
+
+    pre = sub.add_parser("preprocess", help="Row-by-row vs vectorized text cleaning and emotion lexicon features")
+    pre.add_argument("--rows", type=int, default=1_000_000)
+    pre.add_argument("--seed", type=int, default=0)
+
+    base = sub.add_parser("baseline", help="In-memory TF-IDF training vs out-of-core hashed SGD training")
+    base.add_argument("--rows", type=int, default=200_000)
+    base.add_argument("--chunk-size", type=int, default=50_000)
+    base.add_argument("--seed", type=int, default=0)
+
+    pad = sub.add_parser("padding", help="Fixed max-length padding vs length-bucketed dynamic padding (CPU)")
+    pad.add_argument("--rows", type=int, default=2_000, help="Texts for the inference comparison")
+    pad.add_argument("--train-rows", type=int, default=256, help="Texts for the forward+backward comparison")
+    pad.add_argument("--batch-size", type=int, default=32)
+    pad.add_argument("--model-dir", default=str(TRANSFORMER_DIR))
+    pad.add_argument("--seed", type=int, default=0)
+
+    suite = sub.add_parser("suite", help="Time and memory of every pipeline stage at several corpus sizes, as JSON")
+    suite.add_argument("--sizes", type=int, nargs="+", default=SUITE_SIZES, help="Corpus sizes (rows), e.g. 10000 ... 10000000")
+    suite.add_argument("--seed", type=int, default=0)
+    suite.add_argument("--output", default="mental_health_risk_app/artifacts/benchmarks/suite.json")
+    suite.add_argument("--compare", help="Earlier suite JSON to diff against; exits 1 on a regression")
+    suite.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown before a stage counts as regressed")
+    suite.add_argument("--no-memory", action="store_true", help="Skip the separate tracemalloc run of each stage")
+    suite.add_argument("--transformer-rows", type=int, default=512, help="Texts for batch transformer inference")
+    suite.add_argument("--single-rows", type=int, default=50, help="Texts scored one at a time for single-request latency")
+    suite.add_argument("--batch-size", type=int, default=32)
+    suite.add_argument("--model-dir", default=str(TRANSFORMER_DIR))
+
+    startup = sub.add_parser("startup", help="Cold-start import time of app.py, train.py and baseline-only scoring")
+    startup.add_argument("--repeats", type=int, default=3)
+    return p.parse_args()
+
+
+# Reference implementations as they were before vectorization; kept for speed and parity comparisons.
+def _rowwise_clean_text(text: str) -> str:
+    text = text.lower()
+    text = URL_PATTERN.sub(" ", text)
+    text = MENTION_PATTERN.sub(" ", text)
+    text = text.translate(str.maketrans("", "", string.punctuation))
+    return WHITESPACE_PATTERN.sub(" ", text).strip()
+
+
+def _rowwise_emotion_features(df: pd.DataFrame) -> pd.DataFrame:
+    df = df.copy()
+    tokens = df[TEXT_COLUMN].fillna("").str.split()
+    for emotion, words in EMOTION_LEXICON.items():
+        df[f"emo_{emotion}"] = tokens.apply(lambda tok: sum(1 for t in tok if t in words))
+    return df
+
+
+def _report(stage: str, before: float, after: float) -> None:
+    print(f"{stage:<18} row-by-row {before:8.2f}s   vectorized {after:8.2f}s   speedup {before / max(after, 1e-9):5.1f}x")
+
+
+def bench_preprocess(rows: int, seed: int) -> None:
+    texts = synthetic_corpus(rows, seed=seed)[TEXT_COLUMN]
+    print(f"Benchmarking preprocessing on {rows:,} synthetic rows")
+
+    legacy_clean, legacy_clean_m = measure(lambda: texts.fillna("").apply(_rowwise_clean_text))
+    fast_clean, fast_clean_m = measure(lambda: clean_texts(texts))
+    if not legacy_clean.equals(fast_clean):
+        raise AssertionError("clean_texts output differs from the row-by-row clean_text")
+    _report("clean_text", legacy_clean_m.seconds, fast_clean_m.seconds)
+
+    frame = pd.DataFrame({TEXT_COLUMN: fast_clean})
+    legacy_emo, legacy_emo_m = measure(lambda: _rowwise_emotion_features(frame))
+    fast_emo, fast_emo_m = measure(lambda: add_emotion_proxy_features(frame))
+    if not legacy_emo.equals(fast_emo):
+        raise AssertionError("add_emotion_proxy_features output differs from the row-by-row implementation")
+    _report("emotion lexicon", legacy_emo_m.seconds, fast_emo_m.seconds)
+
+    total_before = legacy_clean_m.seconds + legacy_emo_m.seconds
+    total_after = fast_clean_m.seconds + fast_emo_m.seconds
+    _report("total", total_before, total_after)
+    print("Outputs identical.")
+
+
+def _train_in_memory(csv_path: str) -> int:
+    df = preprocess_frame(pd.read_csv(csv_path))
+    train_baseline(df, "logreg", persist=False)
+    return len(df)
+
+
+def _train_out_of_core(csv_path: str, chunk_size: int) -> int:
+    result = train_baseline_incremental(Path(csv_path), chunk_size=chunk_size, holdout_fraction=0.0, persist=False)
+    return result.rows_trained
+
+
+def bench_baseline(rows: int, chunk_size: int, seed: int) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = str(Path(tmp) / "corpus.csv")
+        synthetic_corpus(rows, seed=seed).to_csv(csv_path, index=False)
+        print(f"Benchmarking baseline training on {rows:,} synthetic rows (each run in a fresh process)")
+        # Both paths include CSV parsing and preprocess_frame; VADER cost is identical for the two.
+        for name, fn, args in [
+            ("in-memory tfidf", _train_in_memory, (csv_path,)),
+            (f"out-of-core ({chunk_size:,}/chunk)", _train_out_of_core, (csv_path, chunk_size)),
+        ]:
+            n_rows, m = measure_isolated(fn, *args)
+            print(f"{name:<28} {m.seconds:8.2f}s   {n_rows / m.seconds:10,.0f} rows/s   peak RSS {m.peak_mb:8.0f} MB")
+
+
+def _padded_tokens(lengths: np.ndarray, padding: str, batch_size: int) -> int:
+    if padding == "max_length":
+        return len(lengths) * TRANSFORMER_MAX_LENGTH
+    ordered = np.sort(lengths, kind="stable") if padding == "bucketed" else lengths
+    return int(sum(ordered[i : i + batch_size].max() * len(ordered[i : i + batch_size]) for i in range(0, len(ordered), batch_size)))
+
+
+def _train_steps(tokenizer, model, texts, labels, batch_size: int, padding: str) -> None:
+    import torch
+
+    model = copy.deepcopy(model)
+    model.train()
+    optimizer = torch.optim.AdamW(model.parameters(), lr=2e-5)
+    fixed = padding == "max_length"
+    encodings = tokenizer(texts, truncation=True, max_length=TRANSFORMER_MAX_LENGTH, padding="max_length" if fixed else False)
+    order = np.argsort([len(ids) for ids in encodings["input_ids"]], kind="stable") if padding == "bucketed" else np.arange(len(texts))
+    for start in range(0, len(texts), batch_size):
+        idx = order[start : start + batch_size]
+        batch = tokenizer.pad({k: [v[i] for i in idx] for k, v in encodings.items()}, return_tensors="pt")
+        loss = model(**batch, labels=torch.as_tensor(labels[idx])).loss
+        loss.backward()
+        optimizer.step()
+        optimizer.zero_grad()
+
+
+def bench_padding(rows: int, train_rows: int, batch_size: int, model_dir: str, seed: int) -> None:
+    import torch
+    from transformers import AutoModelForSequenceClassification, AutoTokenizer
+
+    tokenizer = AutoTokenizer.from_pretrained(model_dir)
+    model = AutoModelForSequenceClassification.from_pretrained(model_dir)
+    model.eval()
+    texts = clean_texts(synthetic_corpus(rows, seed=seed)[TEXT_COLUMN]).tolist()
+    lengths = np.array([len(ids) for ids in tokenizer(texts, truncation=True, max_length=TRANSFORMER_MAX_LENGTH)["input_ids"]])
+    print(f"Padding benchmark: {rows:,} texts, mean {lengths.mean():.1f} tokens, batch size {batch_size}, torch threads {torch.get_num_threads()}")
+
+    print("inference (forward only)")
+    for padding in ["max_length", "longest", "bucketed"]:
+        _, m = measure(lambda: predict_transformer(tokenizer, model, texts, batch_size=batch_size, padding=padding))
+        padded = _padded_tokens(lengths, padding, batch_size)
+        print(
+            f"  {padding:<11} {m.seconds:8.2f}s   {lengths.sum() / m.seconds:10,.0f} real tokens/s   "
+            f"{padded / m.seconds:10,.0f} padded tokens/s   padding {1 - lengths.sum() / padded:5.1%}"
+        )
+
+    train_texts = texts[:train_rows]
+    labels = np.random.default_rng(seed).integers(0, model.config.num_labels, size=len(train_texts))
+    print("training (forward + backward + AdamW step)")
+    for padding in ["max_length", "bucketed"]:
+        _, m = measure(lambda: _train_steps(tokenizer, model, train_texts, labels, batch_size, padding))
+        real = lengths[: len(train_texts)].sum()
+        print(f"  {padding:<11} {m.seconds:8.2f}s   {real / m.seconds:10,.0f} real tokens/s")
+
+
+def _suite_stage(stages: Dict[str, dict], name: str, fn: Callable[[], object], rows: int, trace_memory: bool):
+    """Time ``fn`` untraced, then (optionally) rerun it under tracemalloc for its Python-heap peak."""
+    result, timed = measure(fn)
+    entry = {"seconds": timed.seconds, "rows_per_second": rows / max(timed.seconds, 1e-9)}
+    if trace_memory:
+        _, traced = measure(fn, trace_memory=True)
+        entry["peak_mb"] = traced.peak_mb
+    stages[name] = entry
+    memory = f"   peak {entry['peak_mb']:8.1f} MB" if trace_memory else ""
+    print(f"  {name:<24} {timed.seconds:9.3f}s   {entry['rows_per_second']:12,.0f} rows/s{memory}")
+    return result
+
+
+def _fresh_preprocess(df: pd.DataFrame) -> pd.DataFrame:
+    # Without this the second (memory) run and later sizes would mostly hit the sentiment cache.
+    SENTIMENT_CACHE.clear()
+    return preprocess_frame(df)
+
+
+def _suite_size(rows: int, seed: int, trace_memory: bool) -> Dict[str, dict]:
+    stages: Dict[str, dict] = {}
+    df = synthetic_corpus(rows, seed=seed)
+    processed = _suite_stage(stages, "preprocess_frame", lambda: _fresh_preprocess(df), rows, trace_memory)
+    bundle = split_dataset(processed)
+    n_train, n_test = len(bundle.train), len(bundle.test)
+
+    def fit_features():
+        vectorizer = build_tfidf_vectorizer()
+        return vectorizer, prepare_features(bundle.train, vectorizer, fit=True)
+
+    vectorizer, x_train = _suite_stage(stages, "prepare_features (fit)", fit_features, n_train, trace_memory)
+    x_test = _suite_stage(
+        stages, "prepare_features", lambda: prepare_features(bundle.test, vectorizer, fit=False), n_test, trace_memory
+    )
+    model, _ = _suite_stage(
+        stages,
+        "train_baseline",
+        lambda: train_baseline(bundle.train, vectorizer=vectorizer, x_train=x_train, persist=False),
+        n_train,
+        trace_memory,
+    )
+    _suite_stage(stages, "evaluate_model", lambda: evaluate_model(model, vectorizer, bundle.test, x_eval=x_test), n_test, trace_memory)
+    _suite_stage(
+        stages, "shap_top_tokens", lambda: shap_top_tokens(model, vectorizer, bundle.test, features=x_test), n_test, trace_memory
+    )
+    return stages
+
+
+def _suite_transformer(model_dir: str, rows: int, single_rows: int, batch_size: int, seed: int, trace_memory: bool):
+    from transformers import AutoModelForSequenceClassification, AutoTokenizer
+
+    tokenizer = AutoTokenizer.from_pretrained(model_dir)
+    model = AutoModelForSequenceClassification.from_pretrained(model_dir)
+    model.eval()
+    texts = clean_texts(synthetic_corpus(rows, seed=seed)[TEXT_COLUMN]).tolist()
+
+    stages: Dict[str, dict] = {}
+    _suite_stage(
+        stages, "batch_inference", lambda: predict_transformer(tokenizer, model, texts, batch_size=batch_size), rows, trace_memory
+    )
+    latencies = []
+
+    def single_requests():
+        latencies.clear()
+        for text in texts[:single_rows]:
+            start = time.perf_counter()
+            predict_transformer(tokenizer, model, [text])
+            latencies.append(time.perf_counter() - start)
+
+    _suite_stage(stages, "single_inference", single_requests, min(single_rows, rows), trace_memory)
+    stages["single_inference"]["p50_ms"] = float(np.median(latencies) * 1000)
+    stages["single_inference"]["p95_ms"] = float(np.percentile(latencies, 95) * 1000)
+    return stages
+
+
+def bench_suite(args) -> None:
+    trace_memory = not args.no_memory
+    output = {"environment": environment_info(), "config": {k: v for k, v in vars(args).items() if k != "command"}, "results": {}}
+    for rows in args.sizes:
+        print(f"Suite: {rows:,} synthetic rows")
+        output["results"][str(rows)] = _suite_size(rows, args.seed, trace_memory)
+
+    if Path(args.model_dir).exists():
+        print(f"Suite: transformer inference on {args.transformer_rows:,} texts (batch size {args.batch_size})")
+        output["results"]["transformer"] = _suite_transformer(
+            args.model_dir, args.transformer_rows, args.single_rows, args.batch_size, args.seed, trace_memory
+        )
+    else:
+        print(f"Suite: no transformer at {args.model_dir}; skipping transformer inference")
+
+    out_path = Path(args.output)
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    out_path.write_text(json.dumps(output, indent=2))
+    print(f"Results written to {out_path}")
+
+    if args.compare:
+        rows = compare_results(json.loads(Path(args.compare).read_text()), output, args.tolerance)
+        print(f"Compared with {args.compare} (tolerance {args.tolerance:.0%})")
+        for r in rows:
+            flag = "REGRESSION" if r["regression"] else ""
+            print(f"  {r['size']:>10} {r['stage']:<24} {r['old_seconds']:9.3f}s -> {r['new_seconds']:9.3f}s   x{r['ratio']:5.2f} {flag}")
+        if any(r["regression"] for r in rows):
+            raise SystemExit(1)
+
+
+# Each entry runs in a fresh interpreter from the app directory.
+STARTUP_TARGETS = {
+    # Bare-mode script run: what every cold start (and module-level code on every rerun) pays.
+    "app.py": "import runpy; runpy.run_path('app.py', run_name='__main__')",
+    "train.py (import)": "import train",
+    "score.py (import)": "import score",
+    "baseline scoring (1 text)": (
+        "import pandas as pd, score; score.score_chunk(pd.DataFrame({'text': ['I cannot sleep before exams']}), 'baseline', 32)"
+    ),
+}
+
+
+def bench_startup(repeats: int) -> None:
+    app_dir = str(Path(__file__).resolve().parent)
+    print(f"Cold-start time, median of {repeats} fresh interpreters")
+    for name, code in STARTUP_TARGETS.items():
+        if name.startswith("baseline scoring") and not BASELINE_MODEL_PATH.exists():
+            print(f"{name:<28} skipped (train the baseline first)")
+            continue
+        seconds, loaded = measure_startup(code, app_dir, repeats)
+        print(f"{name:<28} {seconds:6.2f}s   heavy modules loaded: {', '.join(loaded) or 'none'}")
+
+
+def main():
+    args = parse_args()
+    if args.command == "preprocess":
+        bench_preprocess(args.rows, args.seed)
+    elif args.command == "baseline":
+        bench_baseline(args.rows, args.chunk_size, args.seed)
+    elif args.command == "padding":
+        bench_padding(args.rows, args.train_rows, args.batch_size, args.model_dir, args.seed)
+    elif args.command == "suite":
+        bench_suite(args)
+    elif args.command == "startup":
+        bench_startup(args.repeats)
+
+
+if __name__ == "__main__":
+    main()
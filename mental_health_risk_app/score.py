@@ -0,0 +1,148 @@
+import argparse
+import time
+from pathlib import Path
+from typing import Iterator, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.cascade import CascadeStats, cascade_predict, get_cascade_band
+from src.config import LABEL_COLUMN, TEXT_COLUMN
+from src.dedup import ScoreCache
+from src.inference import MODEL_NAMES, model_version, score_frame
+from src.preprocess import preprocess_frame
+from src.sentiment import ensure_vader_lexicon
+from src.transformer_backends import BACKENDS
+
+
+def parse_args():
+    p = argparse.ArgumentParser(description="Score a large CSV/JSONL corpus in fixed-size chunks.")
+    p.add_argument("--input", required=True, help="CSV or JSONL file with at least a text column")
+    p.add_argument("--output", required=True, help="Destination .csv or .jsonl for predictions")
+    p.add_argument("--model", choices=MODEL_NAMES, default="baseline")
+    p.add_argument("--chunk-size", type=int, default=50000)
+    p.add_argument("--batch-size", type=int, default=32, help="Forward-pass batch size for the transformer")
+    p.add_argument("--backend", choices=BACKENDS, default="pytorch", help="Transformer runtime (see train.py --export-onnx)")
+    p.add_argument("--band", type=float, help="Cascade uncertainty band around the alert threshold (default: calibrated)")
+    p.add_argument(
+        "--cache-size",
+        type=int,
+        default=100_000,
+        help="Reuse predictions for exact repeats of a text across chunks (0 disables the cache)",
+    )
+    p.add_argument(
+        "--near-duplicates",
+        action="store_true",
+        help="Also reuse predictions for near-duplicate texts (may return a near-copy's prediction, e.g. across a negation)",
+    )
+    p.add_argument("--include-text", action="store_true", help="Copy the raw text column into the output")
+    return p.parse_args()
+
+
+def _is_jsonl(path: Path) -> bool:
+    return path.suffix.lower() in {".jsonl", ".json", ".ndjson"}
+
+
+def read_chunks(path: Path, chunk_size: int) -> Iterator[pd.DataFrame]:
+    if _is_jsonl(path):
+        reader = pd.read_json(path, lines=True, chunksize=chunk_size)
+    else:
+        reader = pd.read_csv(path, chunksize=chunk_size)
+    with reader:
+        yield from reader
+
+
+def score_chunk(
+    chunk: pd.DataFrame,
+    model_name: str,
+    batch_size: int,
+    backend: str = "pytorch",
+    band: Optional[float] = None,
+    cascade_stats: Optional[CascadeStats] = None,
+) -> pd.DataFrame:
+    frame = preprocess_frame(chunk if LABEL_COLUMN in chunk.columns else chunk.assign(**{LABEL_COLUMN: "unknown"}))
+    if model_name == "cascade":
+        result = cascade_predict(frame, band=band, batch_size=batch_size, backend=backend)
+        if cascade_stats is not None:
+            cascade_stats.add(result)
+        return pd.DataFrame(
+            {"prediction": result.predictions, "confidence": result.scores, "escalated": result.escalated}, index=chunk.index
+        )
+    preds, scores = score_frame(frame, model_name, batch_size=batch_size, backend=backend)
+    return pd.DataFrame({"prediction": preds, "confidence": scores}, index=chunk.index)
+
+
+def score_chunk_cached(chunk: pd.DataFrame, cache: ScoreCache, version: str, **score_options) -> pd.DataFrame:
+    """``score_chunk`` for the rows ``cache`` has no result for; the others reuse stored predictions."""
+    texts = chunk[TEXT_COLUMN].fillna("").astype(str).tolist()
+    cached = cache.lookup(texts, version)
+    hit = np.array([c is not None for c in cached], dtype=bool)
+    reused = pd.DataFrame(
+        [c for c in cached if c is not None], columns=["prediction", "confidence"], index=chunk.index[hit]
+    )
+    if score_options["model_name"] == "cascade":
+        reused["escalated"] = False
+    parts = [reused]
+    if not hit.all():
+        scored = score_chunk(chunk[~hit], **score_options)
+        cache.put([t for t, h in zip(texts, hit) if not h], version, scored["prediction"].tolist(), scored["confidence"].tolist())
+        parts.append(scored)
+    result = pd.concat(parts).reindex(chunk.index)
+    result["cached"] = hit
+    return result
+
+
+def write_chunk(result: pd.DataFrame, path: Path, first: bool) -> None:
+    if _is_jsonl(path):
+        with open(path, "w" if first else "a", encoding="utf-8") as f:
+            result.to_json(f, orient="records", lines=True, date_format="iso")
+    else:
+        result.to_csv(path, mode="w" if first else "a", header=first, index=False)
+
+
+def main():
+    args = parse_args()
+    ensure_vader_lexicon()
+    input_path, output_path = Path(args.input), Path(args.output)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+
+    total_rows = 0
+    cascade_stats = CascadeStats()
+    score_options = dict(
+        model_name=args.model, batch_size=args.batch_size, backend=args.backend, band=args.band, cascade_stats=cascade_stats
+    )
+    cache = ScoreCache(args.cache_size, near_duplicates=args.near_duplicates) if args.cache_size > 0 else None
+    if cache is not None:
+        version = f"{model_version(args.model, args.backend)}:{args.band}"
+    start = time.perf_counter()
+    for i, chunk in enumerate(read_chunks(input_path, args.chunk_size)):
+        chunk_start = time.perf_counter()
+        if cache is None:
+            scored = score_chunk(chunk, **score_options)
+        else:
+            scored = score_chunk_cached(chunk, cache, version, **score_options)
+        passthrough = chunk if args.include_text else chunk.drop(columns=[TEXT_COLUMN], errors="ignore")
+        write_chunk(pd.concat([passthrough, scored], axis=1), output_path, first=i == 0)
+
+        total_rows += len(chunk)
+        elapsed = time.perf_counter() - start
+        print(
+            f"chunk {i}: {len(chunk)} rows in {time.perf_counter() - chunk_start:.2f}s "
+            f"({total_rows} total, {total_rows / max(elapsed, 1e-9):,.0f} rows/s)"
+        )
+
+    elapsed = time.perf_counter() - start
+    print(f"Scored {total_rows} rows in {elapsed:.2f}s ({total_rows / max(elapsed, 1e-9):,.0f} rows/s). Output: {output_path}")
+    if cache is not None:
+        print(f"Result cache: {cache.hits} exact and {cache.near_hits} near-duplicate hits, {cache.misses} scored")
+    if args.model == "cascade":
+        summary = cascade_stats.summary(get_cascade_band().get("transformer_seconds_per_row"))
+        print(
+            f"Cascade: {summary['escalated']} of {summary['rows']} rows escalated ({summary['escalation_rate']:.1%}), "
+            f"transformer agreed with the baseline on {summary['escalated_agreement']:.1%} of them"
+            + (f", ~{summary['latency_savings']:.0%} model time saved vs transformer-only" if "latency_savings" in summary else "")
+        )
+
+
+if __name__ == "__main__":
+    main()
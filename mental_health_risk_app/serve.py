@@ -0,0 +1,187 @@
+import argparse
+import asyncio
+import json
+import time
+from typing import Dict, List, Optional, Tuple
+
+from src.batching import MicroBatcher
+from src.dedup import ScoreCache
+from src.inference import MODEL_NAMES, score_texts
+from src.registry import get_transformer
+from src.sentiment import ensure_vader_lexicon
+from src.transformer_backends import BACKENDS
+
+MAX_BODY_BYTES = 1 << 20
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 413: "Payload Too Large", 500: "Internal Server Error"}
+
+
+def parse_args():
+    p = argparse.ArgumentParser(description="Local HTTP inference service with dynamic micro-batching.")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=8000)
+    p.add_argument("--max-batch-size", type=int, default=32)
+    p.add_argument("--max-wait-ms", type=float, default=5.0, help="Longest a request waits for batch-mates")
+    p.add_argument("--models", nargs="+", choices=MODEL_NAMES, default=MODEL_NAMES)
+    p.add_argument("--backend", choices=BACKENDS, default="pytorch", help="Runtime for the transformer model")
+    p.add_argument("--cache-size", type=int, default=100_000, help="Cached results per model (0 disables the result cache)")
+    p.add_argument(
+        "--near-duplicates",
+        action="store_true",
+        help="Also serve cached results for near-duplicate texts (may return a near-copy's prediction, e.g. across a negation)",
+    )
+    return p.parse_args()
+
+
+def _batch_scorer(model_name: str, backend: str = "pytorch", cache: Optional[ScoreCache] = None):
+    def process(texts: List[str]) -> List[Dict[str, object]]:
+        preds, scores = score_texts(texts, model_name, batch_size=len(texts), backend=backend, cache=cache)
+        return [{"prediction": str(p), "confidence": float(s), "model": model_name} for p, s in zip(preds, scores)]
+
+    return process
+
+
+class InferenceServer:
+    """``POST /predict`` with ``{"text": ..., "model": "baseline"|"transformer"}``; ``GET /metrics``; ``GET /health``."""
+
+    def __init__(
+        self,
+        models: List[str],
+        max_batch_size: int,
+        max_wait_ms: float,
+        backend: str = "pytorch",
+        cache_size: int = 0,
+        near_duplicates: bool = False,
+    ):
+        self.backend = backend
+        self.caches = {name: ScoreCache(cache_size, near_duplicates=near_duplicates) for name in models if cache_size > 0}
+        self.batchers = {
+            name: MicroBatcher(
+                _batch_scorer(name, backend, self.caches.get(name)), max_batch_size=max_batch_size, max_wait_ms=max_wait_ms, name=name
+            )
+            for name in models
+        }
+
+    def warm_up(self) -> Dict[str, float]:
+        """Load every served model and score one text with it, so first requests do not pay for loading.
+
+        Bypasses the batchers and caches, so ``/metrics`` only reflects real traffic. Returns seconds per model.
+        """
+        timings = {}
+        for name in self.batchers:
+            start = time.perf_counter()
+            try:
+                score_texts(["warm up"], name, batch_size=1, backend=self.backend)
+                if name == "cascade":
+                    get_transformer(self.backend)  # only loaded on escalation otherwise
+            except FileNotFoundError as exc:
+                print(f"Not warming {name}: model artifacts missing ({exc})")
+                continue
+            timings[name] = time.perf_counter() - start
+        return timings
+
+    async def start(self) -> None:
+        for batcher in self.batchers.values():
+            batcher.start()
+
+    async def stop(self) -> None:
+        for batcher in self.batchers.values():
+            await batcher.stop()
+
+    async def route(self, method: str, path: str, body: bytes) -> Tuple[int, object]:
+        if path == "/health":
+            return 200, {"status": "ok", "models": list(self.batchers)}
+        if path == "/metrics":
+            metrics = {name: batcher.stats() for name, batcher in self.batchers.items()}
+            for name, cache in self.caches.items():
+                metrics[name].update(
+                    cache_hits=cache.hits, cache_near_hits=cache.near_hits, cache_misses=cache.misses, cache_entries=len(cache)
+                )
+            return 200, metrics
+        if path != "/predict":
+            return 404, {"error": f"unknown path {path}"}
+        if method != "POST":
+            return 405, {"error": "use POST"}
+
+        try:
+            payload = json.loads(body or b"{}")
+        except json.JSONDecodeError:
+            return 400, {"error": "body must be JSON"}
+        text = payload.get("text") if isinstance(payload, dict) else None
+        model_name = payload.get("model", "baseline") if isinstance(payload, dict) else None
+        if not isinstance(text, str) or not text.strip():
+            return 400, {"error": "'text' must be a non-empty string"}
+        if model_name not in self.batchers:
+            return 400, {"error": f"'model' must be one of {sorted(self.batchers)}"}
+        try:
+            return 200, await self.batchers[model_name].submit(text)
+        except FileNotFoundError as exc:
+            return 500, {"error": f"model artifacts missing: {exc}"}
+        except Exception as exc:
+            return 500, {"error": f"{type(exc).__name__}: {exc}"}
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, path, _ = request_line.decode("latin-1").split(" ", 2)
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    key, _, value = line.decode("latin-1").partition(":")
+                    headers[key.strip().lower()] = value.strip()
+
+                length = int(headers.get("content-length", 0))
+                if length > MAX_BODY_BYTES:
+                    status, response = 413, {"error": "request body too large"}
+                else:
+                    body = await reader.readexactly(length) if length else b""
+                    status, response = await self.route(method.upper(), path.split("?", 1)[0], body)
+
+                data = json.dumps(response).encode()
+                keep_alive = headers.get("connection", "").lower() != "close" and status != 413
+                writer.write(
+                    f"HTTP/1.1 {status} {REASONS[status]}\r\nContent-Type: application/json\r\n"
+                    f"Content-Length: {len(data)}\r\nConnection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode()
+                    + data
+                )
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ValueError, asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+
+async def serve(args) -> None:
+    server = InferenceServer(
+        args.models, args.max_batch_size, args.max_wait_ms, args.backend, args.cache_size, near_duplicates=args.near_duplicates
+    )
+    timings = server.warm_up()
+    if timings:
+        print("Warmed up " + ", ".join(f"{name} in {seconds:.1f}s" for name, seconds in timings.items()))
+    await server.start()
+    http = await asyncio.start_server(server.handle, args.host, args.port)
+    print(f"Serving {', '.join(args.models)} on http://{args.host}:{args.port} (max batch {args.max_batch_size}, max wait {args.max_wait_ms}ms)")
+    try:
+        async with http:
+            await http.serve_forever()
+    finally:
+        await server.stop()
+
+
+def main():
+    args = parse_args()
+    ensure_vader_lexicon()
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -1,48 +1,137 @@
-import json
-from typing import Dict, List
+from typing import Dict, Optional, Tuple
 
 import numpy as np
 import pandas as pd
-import shap
-from sklearn.metrics import recall_score
+from scipy.signal import lfilter
 
-from .config import GROUP_COLUMN, LABEL_COLUMN, REFERENCE_STATS_PATH, TEXT_COLUMN, USER_ID_COLUMN, TIMESTAMP_COLUMN
-from .modeling import AUX_FEATURES, prepare_features
+from .config import GROUP_COLUMN, LABEL_COLUMN, TEXT_COLUMN, USER_ID_COLUMN, TIMESTAMP_COLUMN
+from .explain import SparseLinearExplainer, column_means
+from .modeling import prepare_features
 
 
-def shap_top_tokens(model, vectorizer, df: pd.DataFrame, sample_size: int = 50) -> Dict[str, List[float]]:
-    sample = df.head(sample_size)
-    x_sample = prepare_features(sample, vectorizer, fit=False)
-    explainer = shap.LinearExplainer(model, x_sample, feature_perturbation="interventional")
-    values = explainer.shap_values(x_sample)
-    token_names = vectorizer.get_feature_names_out().tolist() + AUX_FEATURES
-    mean_abs = np.abs(values).mean(axis=0)
-    top_idx = np.argsort(mean_abs)[-20:][::-1]
-    return {token_names[i]: float(mean_abs[i]) for i in top_idx}
+def shap_top_tokens(
+    model,
+    vectorizer,
+    df: pd.DataFrame,
+    sample_size: Optional[int] = None,
+    features=None,
+    background: Optional[np.ndarray] = None,
+) -> Dict[str, float]:
+    """Top-20 features by mean |SHAP| over ``df`` (all rows unless ``sample_size``) against ``background`` means."""
+    if features is None:
+        features = prepare_features(df if sample_size is None else df.head(sample_size), vectorizer, fit=False)
+    elif sample_size is not None:
+        features = features[:sample_size]
+    if background is None:
+        background = column_means(features)
+    return SparseLinearExplainer(model, vectorizer, background).top_features(features)
 
 
-def fairness_analysis(y_true: np.ndarray, y_pred: np.ndarray, groups: pd.Series) -> Dict[str, Dict[str, float]]:
-    frame = pd.DataFrame({"y_true": y_true, "y_pred": y_pred, "group": groups})
+def grouped_confusion(y_true: np.ndarray, y_pred: np.ndarray, groups) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Confusion counts per group, shape (n_groups, n_classes, n_classes), from a single ``np.bincount``.
+
+    Returns (counts, group labels, class labels); rows with a missing group are dropped, like ``groupby``.
+    """
+    group_codes, group_labels = pd.factorize(pd.Series(groups).to_numpy(), sort=True)
+    class_codes, class_labels = pd.factorize(np.concatenate([np.asarray(y_true), np.asarray(y_pred)]), sort=True)
+    n, n_groups, n_classes = len(group_codes), len(group_labels), len(class_labels)
+    true_codes, pred_codes = class_codes[:n], class_codes[n:]
+    keep = group_codes >= 0
+    cells = (group_codes[keep] * n_classes + true_codes[keep]) * n_classes + pred_codes[keep]
+    counts = np.bincount(cells, minlength=n_groups * n_classes * n_classes)
+    return counts.reshape(n_groups, n_classes, n_classes), group_labels, class_labels
+
+
+def confusion_rates(counts: np.ndarray) -> Dict[str, np.ndarray]:
+    """Support-weighted recall, precision and false-positive rate over the last two (true, pred) axes."""
+    counts = counts.astype(float)
+    tp = np.diagonal(counts, axis1=-2, axis2=-1)
+    support = counts.sum(axis=-1)
+    predicted = counts.sum(axis=-2)
+    total = support.sum(axis=-1, keepdims=True)
+    weight = support / np.maximum(total, 1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        precision = np.where(predicted > 0, tp / predicted, 0.0)
+        fpr = np.where(total - support > 0, (predicted - tp) / (total - support), 0.0)
+    return {
+        # Support-weighted recall is sum(tp) / n, i.e. accuracy, as sklearn's average="weighted" gives.
+        "recall": tp.sum(axis=-1) / np.maximum(total[..., 0], 1),
+        "precision": (weight * precision).sum(axis=-1),
+        "fpr": (weight * fpr).sum(axis=-1),
+    }
+
+
+def fairness_analysis(
+    y_true: np.ndarray,
+    y_pred: np.ndarray,
+    groups: pd.Series,
+    n_bootstrap: int = 1000,
+    confidence: float = 0.95,
+    random_state: int = 42,
+) -> Dict[str, Dict[str, float]]:
+    """Per-group weighted recall/precision/FPR with bootstrap confidence intervals.
+
+    Resampling rows within a group is equivalent to drawing its confusion cells from a multinomial with
+    the observed cell frequencies, so all bootstrap replicates for all groups are one vectorized draw.
+    """
+    counts, group_labels, _ = grouped_confusion(y_true, y_pred, groups)
+    if len(group_labels) == 0:
+        return {}
+    rates = confusion_rates(counts)
+    sizes = counts.sum(axis=(1, 2))
+
+    cells = counts.reshape(len(group_labels), -1)
+    rng = np.random.default_rng(random_state)
+    samples = rng.multinomial(sizes, cells / sizes[:, None], size=(n_bootstrap, len(group_labels)))
+    boot = confusion_rates(samples.reshape(n_bootstrap, *counts.shape))
+    tail = (1 - confidence) / 2 * 100
+    bounds = {name: np.percentile(values, [tail, 100 - tail], axis=0) for name, values in boot.items()}
+
     output = {}
-    for grp, sub in frame.groupby("group"):
+    for i, grp in enumerate(group_labels):
         output[str(grp)] = {
-            "recall": float(recall_score(sub["y_true"], sub["y_pred"], average="weighted", zero_division=0)),
-            "sample_size": int(len(sub)),
+            **{name: float(values[i]) for name, values in rates.items()},
+            **{f"{name}_ci": [float(bounds[name][0, i]), float(bounds[name][1, i])] for name in rates},
+            "sample_size": int(sizes[i]),
         }
-    recalls = [v["recall"] for v in output.values()]
-    if recalls:
-        output["summary"] = {"recall_gap": float(max(recalls) - min(recalls))}
+    output["summary"] = {f"{name}_gap": float(values.max() - values.min()) for name, values in rates.items()}
     return output
 
 
-def temporal_trend(df: pd.DataFrame, prediction_scores: np.ndarray) -> pd.DataFrame:
+def grouped_ewm(values: np.ndarray, group_starts: np.ndarray, alpha: float) -> np.ndarray:
+    """``groupby(...).ewm(alpha=alpha, adjust=True).mean()`` for rows already sorted by group, in one pass.
+
+    A single IIR filter runs the weighted sum across the whole array; the part carried over from the
+    previous group decays geometrically and is subtracted, and the adjust=True normaliser has a closed form.
+    ``group_starts`` is True on the first row of each group.
+    """
+    values = np.asarray(values, dtype=float)
+    if values.size == 0:
+        return values
+    decay = 1.0 - alpha
+    weighted = lfilter([1.0], [1.0, -decay], values)
+    starts = np.flatnonzero(group_starts)
+    lengths = np.diff(np.append(starts, values.size))
+    position = np.arange(values.size) - np.repeat(starts, lengths)
+    carried = np.repeat(np.where(starts > 0, weighted[starts - 1], 0.0), lengths)
+    decay_power = decay ** (position + 1)
+    return (weighted - decay_power * carried) * alpha / (1.0 - decay_power)
+
+
+def temporal_trend(df: pd.DataFrame, prediction_scores: np.ndarray, span: int = 3) -> pd.DataFrame:
     if TIMESTAMP_COLUMN not in df.columns:
         return pd.DataFrame()
     frame = df[[USER_ID_COLUMN, TIMESTAMP_COLUMN]].copy()
     frame["risk_score"] = prediction_scores
     frame = frame.dropna(subset=[TIMESTAMP_COLUMN]).sort_values([USER_ID_COLUMN, TIMESTAMP_COLUMN])
-    frame["rolling_risk"] = frame.groupby(USER_ID_COLUMN)["risk_score"].transform(lambda s: s.ewm(span=3).mean())
-    frame["risk_delta"] = frame.groupby(USER_ID_COLUMN)["rolling_risk"].diff().fillna(0)
+    users = frame[USER_ID_COLUMN].to_numpy()
+    starts = np.ones(len(frame), dtype=bool)
+    starts[1:] = users[1:] != users[:-1]
+    rolling = grouped_ewm(frame["risk_score"].to_numpy(), starts, alpha=2.0 / (span + 1))
+    delta = np.diff(rolling, prepend=0.0)
+    delta[starts] = 0.0
+    frame["rolling_risk"] = rolling
+    frame["risk_delta"] = delta
     return frame
 
 
@@ -55,13 +144,3 @@ def psi_score(expected: np.ndarray, actual: np.ndarray, bins: int = 10) -> float
     actual_hist = np.where(actual_hist == 0, 1e-6, actual_hist)
     return float(np.sum((actual_hist - expected_hist) * np.log(actual_hist / expected_hist)))
 
-
-def monitor_drift(current_non_zero_mean: float) -> Dict[str, float]:
-    if not REFERENCE_STATS_PATH.exists():
-        return {"psi_proxy": 0.0, "alert": 0}
-    stats = json.loads(REFERENCE_STATS_PATH.read_text())
-    reference_value = stats["tfidf_non_zero_mean"]
-    arr_ref = np.repeat(reference_value, 30)
-    arr_cur = np.repeat(current_non_zero_mean, 30)
-    psi = psi_score(arr_ref, arr_cur)
-    return {"psi_proxy": psi, "alert": int(psi > 0.25)}
@@ -0,0 +1,120 @@
+import asyncio
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Generic, List, Optional, Sequence, TypeVar
+
+import numpy as np
+
+Item = TypeVar("Item")
+Result = TypeVar("Result")
+
+
+class LatencyTracker:
+    """Bounded window of recent latencies with percentile summaries."""
+
+    def __init__(self, window: int = 10_000):
+        self._samples = deque(maxlen=window)
+        self.count = 0
+
+    def record(self, seconds: float) -> None:
+        self._samples.append(seconds)
+        self.count += 1
+
+    def summary(self, percentiles: Sequence[float] = (50, 90, 95, 99)) -> Dict[str, float]:
+        if not self._samples:
+            return {"count": self.count}
+        values = np.percentile(np.fromiter(self._samples, dtype=float), percentiles) * 1000
+        return {"count": self.count, **{f"p{p:g}_ms": float(v) for p, v in zip(percentiles, values)}}
+
+
+class MicroBatcher(Generic[Item, Result]):
+    """Coalesces concurrent ``submit`` calls into batches for a synchronous ``process_batch`` function.
+
+    A batch is dispatched as soon as ``max_batch_size`` items are queued or ``max_wait_ms`` has passed
+    since its first item arrived, whichever comes first. Batches run one at a time on a dedicated
+    worker thread so the event loop keeps accepting requests while a forward pass is in flight.
+    """
+
+    def __init__(
+        self,
+        process_batch: Callable[[List[Item]], List[Result]],
+        max_batch_size: int = 32,
+        max_wait_ms: float = 5.0,
+        name: str = "batcher",
+    ):
+        self.process_batch = process_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.latency = LatencyTracker()
+        self.batches = 0
+        self.items = 0
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=name)
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        self._queue = asyncio.Queue()
+        self._worker = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+        self._executor.shutdown(wait=True)
+
+    async def submit(self, item: Item) -> Result:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        started = loop.time()
+        await self._queue.put((item, future))
+        try:
+            return await future
+        finally:
+            self.latency.record(loop.time() - started)
+
+    async def _collect(self) -> List[tuple]:
+        loop = asyncio.get_running_loop()
+        batch = [await self._queue.get()]
+        deadline = loop.time() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            items = [item for item, _ in batch]
+            self.batches += 1
+            self.items += len(items)
+            try:
+                results = await loop.run_in_executor(self._executor, self.process_batch, items)
+            except Exception as exc:  # surface the failure to every waiting request
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(exc)
+                continue
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "latency": self.latency.summary(),
+            "batches": self.batches,
+            "mean_batch_size": self.items / self.batches if self.batches else 0.0,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+        }
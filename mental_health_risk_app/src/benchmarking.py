@@ -0,0 +1,192 @@
+import json
+import multiprocessing
+import os
+import queue
+import subprocess
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .config import GROUP_COLUMN, LABEL_COLUMN, TEXT_COLUMN, TIMESTAMP_COLUMN, USER_ID_COLUMN
+from .preprocess import EMOTION_LEXICON
+
+# Filler vocabulary modelled on data/sample_mental_health.csv; lexicon words are mixed in separately.
+_FILLER_WORDS = (
+    "i feel every day and cannot sleep today am with deadlines constant nothing matters anymore had a "
+    "walk enjoyed myself work pressure is making me all the time for support from friends my thoughts "
+    "are dark very keep happening attacks"
+).split()
+_LABELS = ["depression", "stress", "low_risk"]
+_GROUPS = ["group_a", "group_b", "group_c"]
+_DECORATIONS = ["", "", "", "", "!", "...", " @friend", " https://example.com/post", " 😔", "?"]
+
+
+@dataclass
+class Measurement:
+    seconds: float
+    peak_mb: float
+
+
+def synthetic_corpus(n_rows: int, seed: int = 0, n_users: int = 0) -> pd.DataFrame:
+    """Random posts with the same columns and rough shape as the sample dataset."""
+    rng = np.random.default_rng(seed)
+    lexicon = sorted(word for words in EMOTION_LEXICON.values() for word in words)
+    vocab = np.array(_FILLER_WORDS + lexicon, dtype=object)
+    weights = np.r_[np.full(len(_FILLER_WORDS), 4.0), np.ones(len(lexicon))]
+    weights /= weights.sum()
+
+    lengths = rng.integers(4, 40, size=n_rows)
+    words = rng.choice(vocab, size=int(lengths.sum()), p=weights)
+    bounds = np.r_[0, np.cumsum(lengths)]
+    decorations = rng.choice(np.array(_DECORATIONS, dtype=object), size=n_rows)
+    texts = [
+        " ".join(words[bounds[i] : bounds[i + 1]]).capitalize() + decorations[i] for i in range(n_rows)
+    ]
+
+    n_users = n_users or max(1, n_rows // 20)
+    start = np.datetime64("2025-01-01")
+    return pd.DataFrame(
+        {
+            TEXT_COLUMN: texts,
+            LABEL_COLUMN: rng.choice(_LABELS, size=n_rows),
+            USER_ID_COLUMN: np.char.add("u", rng.integers(0, n_users, size=n_rows).astype(str)),
+            TIMESTAMP_COLUMN: (start + rng.integers(0, 365, size=n_rows).astype("timedelta64[D]")).astype(str),
+            GROUP_COLUMN: rng.choice(_GROUPS, size=n_rows),
+        }
+    )
+
+
+def measure(fn: Callable[[], object], trace_memory: bool = False) -> Tuple[object, Measurement]:
+    """Run ``fn`` once; returns its result with wall time and, if traced, the Python-heap peak.
+
+    tracemalloc slows pure-Python code noticeably, so time and memory are best measured in separate runs.
+    """
+    if trace_memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        result = fn()
+        seconds = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1] if trace_memory else 0
+    finally:
+        if trace_memory:
+            tracemalloc.stop()
+    return result, Measurement(seconds=seconds, peak_mb=peak / (1024 * 1024))
+
+
+def _peak_rss_mb() -> float:
+    try:
+        import resource
+    except ImportError:  # Windows
+        return 0.0
+    # ru_maxrss is KiB on Linux, bytes on macOS.
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale
+
+
+def _isolated_target(queue, fn, args) -> None:
+    start = time.perf_counter()
+    result = fn(*args)
+    queue.put((result, Measurement(seconds=time.perf_counter() - start, peak_mb=_peak_rss_mb())))
+
+
+def measure_isolated(fn: Callable, *args, timeout: Optional[float] = None) -> Tuple[object, Measurement]:
+    """Run ``fn(*args)`` in a fresh interpreter; ``peak_mb`` is that process's peak resident set size.
+
+    ``fn``, its arguments and its return value must be picklable. Raises RuntimeError if the child dies
+    without a result (exception, OOM kill) and TimeoutError after ``timeout`` seconds.
+    """
+    ctx = multiprocessing.get_context("spawn")
+    results = ctx.Queue()
+    process = ctx.Process(target=_isolated_target, args=(results, fn, args))
+    process.start()
+    deadline = None if timeout is None else time.monotonic() + timeout
+    name = getattr(fn, "__name__", repr(fn))
+    try:
+        while True:
+            exited = not process.is_alive()
+            try:
+                # Once the child has exited, anything it put is already in the pipe.
+                result = results.get(timeout=0.1 if exited else 1.0)
+                break
+            except queue.Empty:
+                if exited:
+                    raise RuntimeError(
+                        f"isolated benchmark {name} exited with code {process.exitcode} without a result"
+                        + (" (killed by a signal, e.g. out of memory)" if process.exitcode < 0 else "")
+                    ) from None
+                if deadline is not None and time.monotonic() > deadline:
+                    raise TimeoutError(f"isolated benchmark {name} did not finish in {timeout}s") from None
+    except BaseException:
+        process.terminate()
+        raise
+    finally:
+        process.join()
+    return result
+
+
+HEAVY_MODULES = ("torch", "transformers", "datasets", "nltk", "onnxruntime")
+_STARTUP_WRAPPER = """
+import json, sys, time
+_start = time.perf_counter()
+exec(compile({code!r}, "<startup>", "exec"))
+_seconds = time.perf_counter() - _start
+print(json.dumps({{"seconds": _seconds, "loaded": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+def measure_startup(code: str, cwd: str, repeats: int = 3) -> Tuple[float, List[str]]:
+    """Median wall time of running ``code`` in fresh interpreters, plus which heavy modules it imported."""
+    script = _STARTUP_WRAPPER.format(code=code, heavy=HEAVY_MODULES)
+    times, loaded = [], []
+    for _ in range(repeats):
+        done = subprocess.run([sys.executable, "-c", script], cwd=cwd, capture_output=True, text=True, check=True)
+        report = json.loads(done.stdout.strip().splitlines()[-1])
+        times.append(report["seconds"])
+        loaded = report["loaded"]
+    return float(np.median(times)), loaded
+
+
+def environment_info() -> Dict[str, object]:
+    """Versions and hardware recorded next to suite results, so diffs across machines are recognisable."""
+    import platform
+
+    import scipy
+    import sklearn
+
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "scipy": scipy.__version__,
+        "sklearn": sklearn.__version__,
+    }
+
+
+def compare_results(old: Dict[str, object], new: Dict[str, object], tolerance: float) -> List[Dict[str, object]]:
+    """Stage-by-stage time ratios (new / old) for every (size, stage) present in both suite result files."""
+    rows = []
+    for size, stages in new["results"].items():
+        for stage, m in stages.items():
+            before = old.get("results", {}).get(size, {}).get(stage)
+            if not before or not before.get("seconds"):
+                continue
+            ratio = m["seconds"] / before["seconds"]
+            rows.append(
+                {
+                    "size": size,
+                    "stage": stage,
+                    "old_seconds": before["seconds"],
+                    "new_seconds": m["seconds"],
+                    "ratio": ratio,
+                    "regression": ratio > 1 + tolerance,
+                }
+            )
+    return rows
@@ -0,0 +1,209 @@
+import json
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+from sklearn.metrics import f1_score
+
+from .config import CASCADE_BAND_PATH, RISK_ALERT_THRESHOLD, TEXT_COLUMN
+from .inference import predict_baseline, predict_transformer
+from .registry import REGISTRY, get_baseline, get_transformer
+
+DEFAULT_BAND = 0.1
+CANDIDATE_BANDS = tuple(np.round(np.arange(0.0, 0.51, 0.025), 3))
+
+REGISTRY.register("cascade_band", [CASCADE_BAND_PATH], lambda: json.loads(CASCADE_BAND_PATH.read_text()))
+
+
+@dataclass
+class CascadeResult:
+    predictions: np.ndarray
+    scores: np.ndarray
+    escalated: np.ndarray  # bool per row: scored by the transformer
+    baseline_predictions: np.ndarray
+    baseline_seconds: float
+    transformer_seconds: float
+
+
+@dataclass
+class CascadeStats:
+    """Running totals over cascade calls (e.g. all chunks of a scoring job)."""
+
+    rows: int = 0
+    escalated: int = 0
+    agreeing: int = 0  # escalated rows where the transformer kept the baseline's label
+    baseline_seconds: float = 0.0
+    transformer_seconds: float = 0.0
+
+    def add(self, result: CascadeResult) -> None:
+        self.rows += len(result.escalated)
+        self.escalated += int(result.escalated.sum())
+        self.agreeing += int((result.baseline_predictions[result.escalated] == result.predictions[result.escalated]).sum())
+        self.baseline_seconds += result.baseline_seconds
+        self.transformer_seconds += result.transformer_seconds
+
+    def summary(self, transformer_seconds_per_row: Optional[float] = None) -> Dict[str, float]:
+        """Escalation rate, agreement on escalated rows and latency saved vs running the transformer on every row.
+
+        The saving needs a transformer cost per row; by default it is measured on the escalated rows.
+        """
+        per_row = transformer_seconds_per_row
+        if per_row is None and self.escalated:
+            per_row = self.transformer_seconds / self.escalated
+        summary = {
+            "rows": self.rows,
+            "escalated": self.escalated,
+            "escalation_rate": self.escalated / max(self.rows, 1),
+            "escalated_agreement": self.agreeing / self.escalated if self.escalated else 1.0,
+            "baseline_seconds": self.baseline_seconds,
+            "transformer_seconds": self.transformer_seconds,
+        }
+        if per_row and self.rows:
+            summary["latency_savings"] = 1 - (self.baseline_seconds + self.transformer_seconds) / (per_row * self.rows)
+        return summary
+
+
+def escalation_mask(scores, threshold: float, band: float) -> np.ndarray:
+    """Rows whose baseline confidence is within ``band`` of the alert threshold, i.e. where the alert is uncertain."""
+    return np.abs(np.asarray(scores, dtype=float) - threshold) < band
+
+
+def get_cascade_band() -> Dict[str, float]:
+    """Calibrated {"threshold", "band"} from CASCADE_BAND_PATH, or the defaults before calibration."""
+    try:
+        return REGISTRY.get("cascade_band")
+    except FileNotFoundError:
+        return {"threshold": RISK_ALERT_THRESHOLD, "band": DEFAULT_BAND}
+
+
+def cascade_predict(
+    frame: pd.DataFrame,
+    threshold: Optional[float] = None,
+    band: Optional[float] = None,
+    batch_size: int = 32,
+    backend: str = "pytorch",
+) -> CascadeResult:
+    """Score a preprocessed frame with the baseline and rescore only its uncertain rows with the transformer.
+
+    ``threshold``/``band`` default to the calibrated values (see ``calibrate_band``).
+    """
+    calibrated = get_cascade_band()
+    threshold = calibrated["threshold"] if threshold is None else threshold
+    band = calibrated["band"] if band is None else band
+
+    # Timings cover inference only, not (first-call) model loading.
+    model, vectorizer = get_baseline()
+    start = time.perf_counter()
+    baseline_preds, baseline_scores = predict_baseline(model, vectorizer, frame)
+    baseline_seconds = time.perf_counter() - start
+
+    preds, scores = baseline_preds.astype(object), baseline_scores.astype(float)
+    escalated = escalation_mask(baseline_scores, threshold, band)
+    start = time.perf_counter()
+    if escalated.any():
+        tokenizer, transformer = get_transformer(backend)
+        start = time.perf_counter()
+        texts = frame[TEXT_COLUMN].to_numpy()[escalated].tolist()
+        preds[escalated], scores[escalated] = predict_transformer(tokenizer, transformer, texts, batch_size=batch_size)
+    return CascadeResult(
+        predictions=preds,
+        scores=scores,
+        escalated=escalated,
+        baseline_predictions=baseline_preds,
+        baseline_seconds=baseline_seconds,
+        transformer_seconds=time.perf_counter() - start,
+    )
+
+
+def calibrate_band(
+    y_true: Sequence,
+    baseline_preds: np.ndarray,
+    baseline_scores: np.ndarray,
+    transformer_preds: np.ndarray,
+    transformer_scores: np.ndarray,
+    baseline_seconds_per_row: float,
+    transformer_seconds_per_row: float,
+    threshold: float = RISK_ALERT_THRESHOLD,
+    bands: Sequence[float] = CANDIDATE_BANDS,
+    tolerance: float = 0.01,
+) -> Dict[str, object]:
+    """Pick the narrowest band whose cascade F1 on validation data is within ``tolerance`` of the transformer's.
+
+    Both models are scored once on the whole split; each candidate band is then simulated by mixing their
+    outputs, so calibration costs one pass of each model regardless of the number of candidates.
+    """
+    y_true = np.asarray(y_true)
+    baseline_preds, transformer_preds = np.asarray(baseline_preds, dtype=object), np.asarray(transformer_preds, dtype=object)
+    transformer_alerts = np.asarray(transformer_scores) >= threshold
+    transformer_f1 = f1_score(y_true, transformer_preds, average="weighted", zero_division=0)
+
+    candidates: List[Dict[str, float]] = []
+    for band in bands:
+        escalated = escalation_mask(baseline_scores, threshold, band)
+        preds = np.where(escalated, transformer_preds, baseline_preds)
+        scores = np.where(escalated, transformer_scores, baseline_scores)
+        rate = float(escalated.mean())
+        candidates.append(
+            {
+                "band": float(band),
+                "escalation_rate": rate,
+                "f1": float(f1_score(y_true, preds, average="weighted", zero_division=0)),
+                "agreement": float((preds == transformer_preds).mean()),
+                "alert_agreement": float(((scores >= threshold) == transformer_alerts).mean()),
+                "latency_savings": 1 - (baseline_seconds_per_row + rate * transformer_seconds_per_row) / transformer_seconds_per_row,
+            }
+        )
+
+    good = [c for c in candidates if c["f1"] >= transformer_f1 - tolerance]
+    chosen = min(good, key=lambda c: c["band"]) if good else max(candidates, key=lambda c: (c["f1"], -c["band"]))
+    return {
+        "threshold": threshold,
+        **chosen,
+        "transformer_f1": float(transformer_f1),
+        "baseline_f1": float(f1_score(y_true, baseline_preds, average="weighted", zero_division=0)),
+        "baseline_seconds_per_row": baseline_seconds_per_row,
+        "transformer_seconds_per_row": transformer_seconds_per_row,
+        "tolerance": tolerance,
+        "candidates": candidates,
+    }
+
+
+def calibrate_on_split(
+    frame: pd.DataFrame,
+    y_true: Sequence,
+    threshold: float = RISK_ALERT_THRESHOLD,
+    batch_size: int = 32,
+    backend: str = "pytorch",
+    tolerance: float = 0.01,
+) -> Dict[str, object]:
+    """Score a preprocessed validation frame with both models, calibrate the band and save it to CASCADE_BAND_PATH."""
+    model, vectorizer = get_baseline()
+    start = time.perf_counter()
+    baseline_preds, baseline_scores = predict_baseline(model, vectorizer, frame)
+    baseline_seconds = time.perf_counter() - start
+
+    tokenizer, transformer = get_transformer(backend)
+    start = time.perf_counter()
+    transformer_preds, transformer_scores = predict_transformer(
+        tokenizer, transformer, frame[TEXT_COLUMN].tolist(), batch_size=batch_size
+    )
+    transformer_seconds = time.perf_counter() - start
+
+    n_rows = max(len(frame), 1)
+    result = calibrate_band(
+        y_true,
+        baseline_preds,
+        baseline_scores,
+        transformer_preds,
+        transformer_scores,
+        baseline_seconds / n_rows,
+        transformer_seconds / n_rows,
+        threshold=threshold,
+        tolerance=tolerance,
+    )
+    result["backend"] = backend
+    CASCADE_BAND_PATH.parent.mkdir(parents=True, exist_ok=True)
+    CASCADE_BAND_PATH.write_text(json.dumps(result, indent=2))
+    return result
@@ -7,12 +7,26 @@ DATA_DIR = BASE_DIR / "data"
 
 BASELINE_MODEL_PATH = ARTIFACT_DIR / "baseline_model.joblib"
 VECTORIZER_PATH = ARTIFACT_DIR / "tfidf_vectorizer.joblib"
+FEATURE_MEANS_PATH = ARTIFACT_DIR / "feature_means.npy"
 TRANSFORMER_DIR = ARTIFACT_DIR / "transformer_model"
+ONNX_DIR = ARTIFACT_DIR / "transformer_onnx"
 REFERENCE_STATS_PATH = ARTIFACT_DIR / "reference_stats.json"
-PREDICTION_LOG_PATH = LOG_DIR / "prediction_log.csv"
+TRANSFORMER_REFERENCE_PATH = ARTIFACT_DIR / "transformer_reference_stats.json"
+FEATURE_CACHE_DIR = ARTIFACT_DIR / "feature_cache"
+CASCADE_BAND_PATH = ARTIFACT_DIR / "cascade_band.json"
+PREDICTION_LOG_DIR = LOG_DIR / "predictions"
+USER_STATE_PATH = LOG_DIR / "user_risk.sqlite"
+
+TRANSFORMER_MAX_LENGTH = 128
+RISK_ALERT_THRESHOLD = 0.7
+# Labels that mean "not at risk"; every other class counts towards a user's rolling risk.
+LOW_RISK_LABELS = ("low_risk",)
+# Risk events older than this are pruned; top_risers windows cannot reach further back.
+USER_EVENT_RETENTION_DAYS = 30
 
 TEXT_COLUMN = "text"
 LABEL_COLUMN = "label"
 USER_ID_COLUMN = "user_id"
 TIMESTAMP_COLUMN = "timestamp"
 GROUP_COLUMN = "group"
+DUPLICATE_GROUP_COLUMN = "duplicate_group"
@@ -0,0 +1,228 @@
+import threading
+import zlib
+from collections import OrderedDict
+from typing import Dict, Hashable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
+
+from .cache import content_hash
+from .config import TEXT_COLUMN
+from .preprocess import clean_texts
+
+NUM_PERM = 64
+BANDS = 8  # x 8 rows: pairs with Jaccard ~0.8 collide in some band with probability ~0.99, ~0.5 with ~0.2
+SHINGLE_SIZE = 3
+DEDUP_THRESHOLD = 0.8
+_PRIME = np.uint64((1 << 31) - 1)
+_BAND_MULTIPLIER = np.uint64(0x9E3779B97F4A7C15)
+
+
+def _permutations(num_perm: int, seed: int) -> Tuple[np.ndarray, np.ndarray]:
+    rng = np.random.default_rng(seed)
+    a = rng.integers(1, int(_PRIME), size=num_perm, dtype=np.uint64)
+    b = rng.integers(0, int(_PRIME), size=num_perm, dtype=np.uint64)
+    return a, b
+
+
+def _mod_mersenne31(x: np.ndarray) -> np.ndarray:
+    """``x % (2**31 - 1)`` for x < 2**63, in place, with shifts and masks instead of integer division."""
+    high = np.right_shift(x, np.uint64(31))
+    for _ in range(2):
+        np.bitwise_and(x, _PRIME, out=x)
+        x += high
+        np.right_shift(x, np.uint64(31), out=high)
+    np.subtract(x, _PRIME, out=x, where=x >= _PRIME)
+    return x
+
+
+def _shingle_hashes(texts: Sequence[str], shingle_size: int) -> Tuple[np.ndarray, np.ndarray]:
+    """32-bit hashes of every word shingle in ``texts`` (flat) and the number of shingles per text.
+
+    Each distinct word is CRC32-hashed once; shingle hashes combine the word hashes arithmetically, so no
+    shingle strings are built. Texts shorter than ``shingle_size`` words form a single (zero-padded) shingle.
+    """
+    words = [text.split() for text in texts]
+    n_words = np.fromiter(map(len, words), dtype=np.int64, count=len(words))
+    codes, uniques = pd.factorize(pd.Series([w for row in words for w in row], dtype=object))
+    word_hash = np.fromiter(
+        (zlib.crc32(w.encode("utf-8", "surrogatepass")) for w in uniques), dtype=np.uint64, count=len(uniques)
+    )[codes]
+    # Trailing zero pads the shingles of texts shorter than shingle_size.
+    word_hash = np.append(word_hash, np.uint64(0))
+
+    n_shingles = np.maximum(n_words - shingle_size + 1, 1)
+    text_of = np.repeat(np.arange(len(texts)), n_shingles)
+    offset = np.arange(int(n_shingles.sum())) - np.repeat(np.cumsum(n_shingles) - n_shingles, n_shingles)
+    first_word = (np.cumsum(n_words) - n_words)[text_of] + offset
+    combined = np.zeros(first_word.size, dtype=np.uint64)
+    with np.errstate(over="ignore"):
+        for j in range(shingle_size):
+            word = np.where(offset + j < n_words[text_of], first_word + j, word_hash.size - 1)
+            combined = combined * _BAND_MULTIPLIER + word_hash[word] + np.uint64(1)
+    return (combined >> np.uint64(32)) ^ (combined & np.uint64(0xFFFFFFFF)), n_shingles
+
+
+def minhash_signatures(
+    texts: Sequence[str],
+    num_perm: int = NUM_PERM,
+    shingle_size: int = SHINGLE_SIZE,
+    seed: int = 1,
+    chunk_size: int = 2000,
+) -> np.ndarray:
+    """MinHash signatures (n_texts, num_perm) over word shingles of already cleaned texts.
+
+    Shingles are hashed via CRC32 and permuted as ``(a * h + b) mod (2**31 - 1)``. Texts are processed in
+    chunks, so peak memory is the output (4 bytes per permutation per row) plus one chunk's shingle matrix.
+    """
+    a, b = _permutations(num_perm, seed)
+    signatures = np.empty((len(texts), num_perm), dtype=np.uint32)
+    for start in range(0, len(texts), chunk_size):
+        hashes, counts = _shingle_hashes(texts[start : start + chunk_size], shingle_size)
+        # (num_perm, n_shingles) so the per-text minimum runs over contiguous memory.
+        permuted = a[:, None] * hashes
+        permuted += b[:, None]
+        _mod_mersenne31(permuted)
+        offsets = np.cumsum(counts) - counts
+        signatures[start : start + counts.size] = np.minimum.reduceat(permuted, offsets, axis=1).T
+    return signatures
+
+
+def band_keys(signatures: np.ndarray, bands: int = BANDS) -> np.ndarray:
+    """One 64-bit hash per (row, band) of the signature, shape (n_texts, bands)."""
+    n_rows, num_perm = signatures.shape
+    rows_per_band = num_perm // bands
+    blocks = signatures[:, : bands * rows_per_band].reshape(n_rows, bands, rows_per_band).astype(np.uint64)
+    keys = np.zeros((n_rows, bands), dtype=np.uint64)
+    with np.errstate(over="ignore"):
+        for j in range(rows_per_band):
+            keys = keys * _BAND_MULTIPLIER + blocks[:, :, j]
+    return keys
+
+
+def near_duplicate_groups(
+    signatures: np.ndarray, bands: int = BANDS, threshold: float = DEDUP_THRESHOLD, verify_chunk: int = 1_000_000
+) -> np.ndarray:
+    """Group id per row; rows whose estimated Jaccard similarity is >= ``threshold`` share a group.
+
+    Candidates are rows with an identical band hash in any band (found by sorting the keys, not pairwise).
+    Each candidate is verified against the first row of its bucket by the fraction of agreeing signature
+    positions, and verified pairs are merged transitively (connected components).
+    """
+    n_rows = signatures.shape[0]
+    keys = band_keys(signatures, bands)
+    sources, targets = [], []
+    for band in range(bands):
+        order = np.argsort(keys[:, band], kind="stable")
+        sorted_keys = keys[order, band]
+        starts = np.flatnonzero(np.r_[True, sorted_keys[1:] != sorted_keys[:-1]])
+        sizes = np.diff(np.r_[starts, n_rows])
+        anchors = np.repeat(order[starts], sizes)
+        pairs = anchors != order
+        anchors, members = anchors[pairs], order[pairs]
+        # Verified in slices so a corpus full of reposts does not materialize every candidate pair at once.
+        for lo in range(0, anchors.size, verify_chunk):
+            a, m = anchors[lo : lo + verify_chunk], members[lo : lo + verify_chunk]
+            similar = (signatures[a] == signatures[m]).mean(axis=1) >= threshold
+            sources.append(a[similar])
+            targets.append(m[similar])
+    sources, targets = np.concatenate(sources or [np.empty(0, np.int64)]), np.concatenate(targets or [np.empty(0, np.int64)])
+    graph = coo_matrix((np.ones(sources.size, dtype=bool), (sources, targets)), shape=(n_rows, n_rows))
+    _, labels = connected_components(graph, directed=False)
+    return labels
+
+
+def duplicate_groups(texts: pd.Series, threshold: float = DEDUP_THRESHOLD, **minhash_options) -> np.ndarray:
+    """Near-duplicate group ids for raw texts, compared after ``clean_texts`` normalization."""
+    signatures = minhash_signatures(clean_texts(texts.fillna("").astype(str)).tolist(), **minhash_options)
+    return near_duplicate_groups(signatures, threshold=threshold)
+
+
+def drop_near_duplicates(df: pd.DataFrame, threshold: float = DEDUP_THRESHOLD) -> pd.DataFrame:
+    """Keep the first row of every near-duplicate group."""
+    groups = duplicate_groups(df[TEXT_COLUMN], threshold=threshold)
+    return df[~pd.Series(groups).duplicated().to_numpy()].reset_index(drop=True)
+
+
+class ScoreCache:
+    """Scoring results keyed by model version and cleaned text, with opt-in near-duplicate lookup.
+
+    Exact repeats are found by content hash. With ``near_duplicates``, texts that are not exact repeats are
+    MinHashed and looked up in a band index; a cached text whose signature agrees on at least ``threshold``
+    of positions is returned as a hit. Off by default: a near-copy can differ in exactly the words that
+    matter ("i want to end my life" vs "i do not want to end my life"). Entries are evicted
+    least-recently-used, together with their band index entries.
+    """
+
+    def __init__(self, maxsize: int = 100_000, near_duplicates: bool = False, threshold: float = 0.9):
+        self.maxsize = maxsize
+        self.near_duplicates = near_duplicates
+        self.threshold = threshold
+        self._entries: "OrderedDict[Hashable, Tuple[object, float, Optional[np.ndarray]]]" = OrderedDict()
+        self._bands: Dict[Tuple[str, int, int], Hashable] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.near_hits = 0
+        self.misses = 0
+
+    def _signatures(self, cleaned: List[str]) -> np.ndarray:
+        return minhash_signatures(cleaned) if self.near_duplicates and cleaned else np.empty((len(cleaned), NUM_PERM), np.uint32)
+
+    def lookup(self, texts: Sequence[str], version: str) -> List[Optional[Tuple[object, float]]]:
+        """Cached (prediction, confidence) per text, or None where it has to be scored."""
+        cleaned = clean_texts(pd.Series(list(texts), dtype=object).fillna("")).tolist()
+        results: List[Optional[Tuple[object, float]]] = [None] * len(cleaned)
+        missing = []
+        with self._lock:
+            for i, text in enumerate(cleaned):
+                cache_key = (version, content_hash(text))
+                entry = self._entries.get(cache_key)
+                if entry is not None:
+                    self._entries.move_to_end(cache_key)
+                    results[i] = entry[:2]
+                    self.hits += 1
+                else:
+                    missing.append(i)
+            if not (self.near_duplicates and missing):
+                self.misses += len(missing)
+                return results
+
+        signatures = self._signatures([cleaned[i] for i in missing])
+        keys = band_keys(signatures)
+        with self._lock:
+            for row, i in enumerate(missing):
+                for band, key in enumerate(keys[row]):
+                    candidate = self._bands.get((version, band, int(key)))
+                    entry = self._entries.get(candidate) if candidate is not None else None
+                    if entry is not None and (entry[2] == signatures[row]).mean() >= self.threshold:
+                        self._entries.move_to_end(candidate)
+                        results[i] = entry[:2]
+                        self.near_hits += 1
+                        break
+                else:
+                    self.misses += 1
+        return results
+
+    def put(self, texts: Sequence[str], version: str, predictions: Sequence, scores: Sequence[float]) -> None:
+        cleaned = clean_texts(pd.Series(list(texts), dtype=object).fillna("")).tolist()
+        signatures = self._signatures(cleaned)
+        keys = band_keys(signatures) if self.near_duplicates else None
+        with self._lock:
+            for row, (text, pred, score) in enumerate(zip(cleaned, predictions, scores)):
+                cache_key = (version, content_hash(text))
+                self._entries[cache_key] = (pred, float(score), signatures[row] if self.near_duplicates else None)
+                self._entries.move_to_end(cache_key)
+                if keys is not None:
+                    for band, key in enumerate(keys[row]):
+                        self._bands[(version, band, int(key))] = cache_key
+            while len(self._entries) > self.maxsize:
+                old_key, (_, _, signature) = self._entries.popitem(last=False)
+                if signature is not None:
+                    for band, key in enumerate(band_keys(signature[None, :])[0]):
+                        if self._bands.get((old_key[0], band, int(key))) == old_key:
+                            del self._bands[(old_key[0], band, int(key))]
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,217 @@
+import json
+import threading
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, List, Mapping, Optional
+
+import numpy as np
+import pandas as pd
+
+from .config import REFERENCE_STATS_PATH, TRANSFORMER_REFERENCE_PATH
+from .modeling import AUX_FEATURES, FeatureBlocks
+from .registry import REGISTRY
+
+DRIFT_FEATURES = ["nnz", *AUX_FEATURES, "score"]
+REFERENCE_QUANTILES = (0.01, 0.05, 0.25, 0.5, 0.75, 0.95, 0.99)
+REFERENCE_PATHS = {"baseline": REFERENCE_STATS_PATH, "transformer": TRANSFORMER_REFERENCE_PATH}
+PSI_ALERT = 0.25
+_EPS = 1e-6
+
+
+class ReservoirSample:
+    """Fixed-size uniform sample of a stream, used as a quantile sketch when data does not fit in memory.
+
+    Every value gets a random key and the ``size`` smallest keys are kept, so updates are vectorized
+    per chunk and the result is a uniform sample of everything seen.
+    """
+
+    def __init__(self, size: int = 20000, seed: int = 42):
+        self.size = size
+        self.rng = np.random.default_rng(seed)
+        self.keys = np.empty(0)
+        self.values = np.empty(0)
+        self.count = 0
+
+    def update(self, values) -> None:
+        values = np.asarray(values, dtype=float)
+        self.count += values.size
+        keys = np.concatenate([self.keys, self.rng.random(values.size)])
+        merged = np.concatenate([self.values, values])
+        if merged.size > self.size:
+            keep = np.argpartition(keys, self.size)[: self.size]
+            keys, merged = keys[keep], merged[keep]
+        self.keys, self.values = keys, merged
+
+
+def feature_profile(values, bins: int = 10) -> Optional[Dict[str, object]]:
+    """Reference histogram (quantile bin edges + proportions) and quantile summary for one feature."""
+    values = np.asarray(values, dtype=float)
+    values = values[np.isfinite(values)]
+    if values.size == 0:
+        return None
+    # Ties (e.g. mostly-zero lexicon counts) collapse duplicate cut points into fewer, wider bins.
+    edges = np.unique(np.quantile(values, np.linspace(0, 1, bins + 1)[1:-1]))
+    counts = np.bincount(np.searchsorted(edges, values, side="right"), minlength=edges.size + 1)
+    return {
+        "edges": edges.tolist(),
+        "proportions": (counts / values.size).tolist(),
+        "quantiles": dict(zip(map(str, REFERENCE_QUANTILES), np.quantile(values, REFERENCE_QUANTILES).tolist())),
+        "mean": float(values.mean()),
+        "count": int(values.size),
+    }
+
+
+def reference_profile(columns: Mapping[str, object], bins: int = 10) -> Dict[str, Dict[str, object]]:
+    profiles = {name: feature_profile(values, bins) for name, values in columns.items()}
+    return {name: profile for name, profile in profiles.items() if profile is not None}
+
+
+def drift_columns(df: pd.DataFrame, scores, features=None) -> Dict[str, np.ndarray]:
+    """Per-row drift features: non-zeros of the baseline feature row (if ``features`` given), aux features, score."""
+    columns = {}
+    if isinstance(features, FeatureBlocks):
+        columns["nnz"] = features.row_nnz().astype(float)
+    elif features is not None:
+        columns["nnz"] = features.getnnz(axis=1).astype(float)
+    aux = df.reindex(columns=AUX_FEATURES, fill_value=0.0).astype(float)
+    columns.update({name: aux[name].to_numpy() for name in AUX_FEATURES})
+    columns["score"] = np.asarray(scores, dtype=float)
+    return columns
+
+
+def save_transformer_reference(profile: Dict[str, Dict[str, object]]) -> None:
+    TRANSFORMER_REFERENCE_PATH.parent.mkdir(parents=True, exist_ok=True)
+    TRANSFORMER_REFERENCE_PATH.write_text(json.dumps({"drift": profile}, indent=2))
+
+
+def _reference_loader(path: Path):
+    return lambda: json.loads(path.read_text()).get("drift", {})
+
+
+for _model, _path in REFERENCE_PATHS.items():
+    REGISTRY.register(f"drift_reference:{_model}", [_path], _reference_loader(_path))
+
+
+class DriftMonitor:
+    """Sliding-window PSI against a reference profile in constant memory.
+
+    The last ``window`` observations are kept as per-feature bin indices in a ring buffer alongside
+    running bin counts; each update adds the new row's bins and subtracts the evicted row's, so PSI
+    for every feature is computed from counts without rescanning history.
+    """
+
+    def __init__(self, reference: Dict[str, Dict[str, object]], window: int = 500, min_samples: int = 50):
+        self.reference = reference
+        self.features = [name for name in DRIFT_FEATURES if name in reference]
+        self.edges = [np.asarray(reference[name]["edges"], dtype=float) for name in self.features]
+        n_bins = max((len(reference[name]["proportions"]) for name in self.features), default=1)
+        self.expected = np.full((len(self.features), n_bins), np.nan)
+        for i, name in enumerate(self.features):
+            props = reference[name]["proportions"]
+            self.expected[i, : len(props)] = props
+        self.window = window
+        self.min_samples = min_samples
+        # -1 marks "missing" (e.g. nnz for a transformer-only row) and is never counted.
+        self._bins = np.full((window, len(self.features)), -1, dtype=np.int16)
+        self._counts = np.zeros((len(self.features), n_bins), dtype=np.int64)
+        self._filled = np.zeros(len(self.features), dtype=np.int64)
+        self._next = 0
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def _bin_row(self, values: Mapping[str, float]) -> np.ndarray:
+        row = np.full(len(self.features), -1, dtype=np.int16)
+        for i, name in enumerate(self.features):
+            value = values.get(name)
+            if value is not None and np.isfinite(value):
+                row[i] = np.searchsorted(self.edges[i], value, side="right")
+        return row
+
+    def update(self, values: Mapping[str, float]) -> None:
+        row = self._bin_row(values)
+        feature_idx = np.arange(len(self.features))
+        with self._lock:
+            if self._size == self.window:
+                old = self._bins[self._next]
+                seen = old >= 0
+                np.subtract.at(self._counts, (feature_idx[seen], old[seen]), 1)
+                self._filled -= seen
+            else:
+                self._size += 1
+            present = row >= 0
+            np.add.at(self._counts, (feature_idx[present], row[present]), 1)
+            self._filled += present
+            self._bins[self._next] = row
+            self._next = (self._next + 1) % self.window
+
+    def update_many(self, columns: Mapping[str, object]) -> None:
+        frame = pd.DataFrame({name: columns[name] for name in self.features if name in columns})
+        for values in frame.to_dict(orient="records"):
+            self.update(values)
+
+    def psi(self) -> Dict[str, float]:
+        with self._lock:
+            counts, filled = self._counts.astype(float), self._filled.copy()
+        actual = counts / np.maximum(filled, 1)[:, None]
+        valid = ~np.isnan(self.expected)
+        expected = np.where(valid, np.maximum(np.nan_to_num(self.expected), _EPS), 1.0)
+        actual = np.where(valid, np.maximum(actual, _EPS), 1.0)
+        values = ((actual - expected) * np.log(actual / expected)).sum(axis=1)
+        return {name: float(v) for name, v, n in zip(self.features, values, filled) if n > 0}
+
+    def summary(self) -> Dict[str, object]:
+        psi = self.psi()
+        worst = max(psi, key=psi.get) if psi else None
+        ready = self._size >= self.min_samples
+        max_psi = psi[worst] if worst else 0.0
+        return {
+            "psi": max_psi,
+            "worst_feature": worst,
+            "per_feature": psi,
+            "window_size": self._size,
+            "alert": int(ready and max_psi > PSI_ALERT),
+        }
+
+
+_MONITORS: Dict[str, DriftMonitor] = {}
+_MONITORS_LOCK = threading.Lock()
+
+
+def _warm_start(monitor: DriftMonitor, model_name: str, lookback: timedelta) -> None:
+    """Seed the window from the most recent logged predictions of ``model_name``."""
+    from .prediction_log import read_predictions
+
+    columns = ["model", "confidence", *[name for name in monitor.features if name != "score"]]
+    try:
+        recent = read_predictions(start=datetime.now(timezone.utc) - lookback, columns=columns)
+    except (OSError, KeyError, ValueError):
+        return
+    recent = recent[recent["model"] == model_name].tail(monitor.window)
+    if not recent.empty:
+        monitor.update_many({**{c: recent[c].to_numpy() for c in columns[2:]}, "score": recent["confidence"].to_numpy()})
+
+
+def get_drift_monitor(model_name: str, window: int = 500, lookback: timedelta = timedelta(days=1)) -> Optional[DriftMonitor]:
+    """Process-wide monitor for ``model_name``; rebuilt (and re-seeded from the log) when its reference changes."""
+    try:
+        reference = REGISTRY.get(f"drift_reference:{model_name}")
+    except FileNotFoundError:
+        return None
+    if not reference:
+        return None
+    with _MONITORS_LOCK:
+        monitor = _MONITORS.get(model_name)
+        if monitor is None or monitor.reference is not reference:
+            monitor = DriftMonitor(reference, window=window)
+            _warm_start(monitor, model_name, lookback)
+            _MONITORS[model_name] = monitor
+        return monitor
+
+
+def monitor_drift(model_name: str, values: Mapping[str, float]) -> Dict[str, object]:
+    """Record one live prediction's drift features and return the current window's PSI summary."""
+    monitor = get_drift_monitor(model_name)
+    if monitor is None:
+        return {"psi": 0.0, "worst_feature": None, "per_feature": {}, "window_size": 0, "alert": 0}
+    monitor.update(values)
+    return monitor.summary()
@@ -0,0 +1,86 @@
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+from scipy.sparse import csr_matrix
+
+from .cache import LRUCache, content_hash
+from .config import BASELINE_MODEL_PATH, FEATURE_MEANS_PATH, VECTORIZER_PATH
+from .modeling import feature_names
+from .registry import REGISTRY, get_baseline
+
+
+def column_means(features) -> np.ndarray:
+    return np.asarray(csr_matrix(features).mean(axis=0)).ravel()
+
+
+class SparseLinearExplainer:
+    """Exact (interventional) SHAP values for linear models, computed on the sparse matrix directly.
+
+    For a linear model the SHAP value of feature j in row x is ``coef_j * (x_j - mean_j)`` against the
+    background mean, which is what ``shap.LinearExplainer`` returns. Per-row explanations only touch the
+    row's non-zeros and the batch summary uses a closed form per column, so nothing is ever densified.
+    """
+
+    def __init__(self, model, vectorizer, background_mean: Optional[np.ndarray] = None, cache_size: int = 10_000):
+        if not hasattr(model, "coef_"):
+            raise TypeError(f"{type(model).__name__} is not a linear model with coef_")
+        self.vectorizer = vectorizer
+        self.classes = model.classes_
+        self.coef = np.asarray(model.coef_, dtype=float)
+        n_features = self.coef.shape[1]
+        self.mean = np.zeros(n_features) if background_mean is None else np.asarray(background_mean, dtype=float)
+        self.cache = LRUCache(cache_size)
+
+    def _class_weights(self, label) -> Tuple[np.ndarray, float]:
+        """Coefficient row pushing towards ``label`` (binary models only store the positive class)."""
+        if self.coef.shape[0] == 1:
+            return self.coef[0], 1.0 if label == self.classes[-1] else -1.0
+        return self.coef[int(np.flatnonzero(self.classes == label)[0])], 1.0
+
+    def mean_abs(self, features) -> np.ndarray:
+        """Mean |SHAP| per feature over all rows, averaged over classes, in O(nnz + n_features)."""
+        features = csr_matrix(features)
+        n_rows = features.shape[0]
+        if n_rows == 0:
+            return np.zeros(self.coef.shape[1])
+        cols, data = features.indices, features.data
+        # sum_i |x_ij - mean_j| = sum over stored entries + (rows where x_ij == 0) * |mean_j|
+        deviation = np.bincount(cols, weights=np.abs(data - self.mean[cols]), minlength=self.mean.size)
+        deviation += (n_rows - np.bincount(cols, minlength=self.mean.size)) * np.abs(self.mean)
+        return np.abs(self.coef).mean(axis=0) * deviation / n_rows
+
+    def top_features(self, features, top_k: int = 20) -> Dict[str, float]:
+        mean_abs = self.mean_abs(features)
+        top_idx = np.argsort(mean_abs)[-top_k:][::-1]
+        return dict(zip(feature_names(self.vectorizer, top_idx), map(float, mean_abs[top_idx])))
+
+    def explain_row(self, row, label, top_k: int = 8) -> List[Tuple[str, float]]:
+        """Signed SHAP values towards ``label`` for the terms present in one row, largest |value| first."""
+        row = csr_matrix(row)
+        weights, sign = self._class_weights(label)
+        idx = row.indices
+        values = sign * weights[idx] * (row.data - self.mean[idx])
+        order = np.argsort(-np.abs(values))[:top_k]
+        return list(zip(feature_names(self.vectorizer, idx[order]), map(float, values[order])))
+
+    def explain_text(self, text: str, label, compute_row: Callable[[], object], top_k: int = 8) -> List[Tuple[str, float]]:
+        """``explain_row`` memoized by text hash; ``compute_row`` is only called on a cache miss."""
+        key = (content_hash(text), str(label), top_k)
+        terms = self.cache.get(key)
+        if terms is None:
+            terms = self.explain_row(compute_row(), label, top_k)
+            self.cache.put(key, terms)
+        return terms
+
+
+def _load_explainer() -> SparseLinearExplainer:
+    model, vectorizer = get_baseline()
+    means = np.load(FEATURE_MEANS_PATH) if FEATURE_MEANS_PATH.exists() else None
+    return SparseLinearExplainer(model, vectorizer, means)
+
+
+REGISTRY.register("explainer", [BASELINE_MODEL_PATH, VECTORIZER_PATH, FEATURE_MEANS_PATH], _load_explainer)
+
+
+def get_explainer() -> SparseLinearExplainer:
+    return REGISTRY.get("explainer")
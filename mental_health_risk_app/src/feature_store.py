@@ -0,0 +1,158 @@
+import hashlib
+import json
+import shutil
+import uuid
+from pathlib import Path
+from typing import Callable, Optional, Tuple
+
+import joblib
+import numpy as np
+import pandas as pd
+from scipy.sparse import csr_matrix
+
+from .config import FEATURE_CACHE_DIR
+from .modeling import build_tfidf_vectorizer, prepare_features
+
+# Bump whenever preprocess_frame / prepare_features output changes, so stale cache entries are ignored.
+FEATURE_VERSION = "1"
+
+
+def file_digest(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def config_key(*parts) -> str:
+    payload = json.dumps([FEATURE_VERSION, *parts], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()[:20]
+
+
+def vectorizer_config(vectorizer) -> dict:
+    params = {k: v for k, v in vectorizer.get_params().items() if not callable(v) or isinstance(v, type)}
+    return {"class": type(vectorizer).__name__, **params}
+
+
+def save_csr(matrix, directory: Path) -> None:
+    """Store a CSR matrix as raw .npy arrays (unlike .npz these can be memory-mapped on load)."""
+    matrix = csr_matrix(matrix)
+    directory.mkdir(parents=True, exist_ok=True)
+    np.save(directory / "data.npy", matrix.data)
+    np.save(directory / "indices.npy", matrix.indices)
+    np.save(directory / "indptr.npy", matrix.indptr)
+    (directory / "shape.json").write_text(json.dumps(list(matrix.shape)))
+
+
+def load_csr(directory: Path, mmap: bool = True) -> csr_matrix:
+    mode = "r" if mmap else None
+    arrays = [np.load(directory / f"{name}.npy", mmap_mode=mode) for name in ("data", "indices", "indptr")]
+    shape = tuple(json.loads((directory / "shape.json").read_text()))
+    return csr_matrix(tuple(arrays), shape=shape, copy=False)
+
+
+class FeatureStore:
+    """Content-addressed cache for preprocessed frames (Parquet), sparse matrices (.npy) and fitted objects.
+
+    Every entry lives in its own directory named by a key that the caller derives from the data hash
+    and the relevant preprocessing/vectorizer configuration. Entries are written to a temporary
+    directory and renamed into place, so an interrupted run never leaves a half-written entry behind.
+    """
+
+    def __init__(self, root: Path = FEATURE_CACHE_DIR, enabled: bool = True):
+        self.root = Path(root)
+        self.enabled = enabled
+
+    def _entry(self, kind: str, key: str) -> Path:
+        return self.root / f"{kind}-{key}"
+
+    def _store(self, target: Path, write: Callable[[Path], None]) -> None:
+        tmp = self.root / f".tmp-{uuid.uuid4().hex}"
+        tmp.mkdir(parents=True)
+        try:
+            write(tmp)
+            tmp.rename(target)
+        except OSError:
+            # Another process stored the same entry first; theirs is equivalent.
+            if not target.exists():
+                raise
+        finally:
+            shutil.rmtree(tmp, ignore_errors=True)
+
+    def frame(self, key: str, build: Callable[[], pd.DataFrame]) -> pd.DataFrame:
+        entry = self._entry("frame", key)
+        if self.enabled and entry.exists():
+            return pd.read_parquet(entry / "frame.parquet")
+        df = build()
+        if self.enabled:
+            self._store(entry, lambda d: df.to_parquet(d / "frame.parquet", index=False))
+        return df
+
+    def matrix(self, key: str, build: Callable[[], csr_matrix]) -> csr_matrix:
+        entry = self._entry("matrix", key)
+        if self.enabled and entry.exists():
+            return load_csr(entry)
+        matrix = csr_matrix(build())
+        if self.enabled:
+            self._store(entry, lambda d: save_csr(matrix, d))
+        return matrix
+
+    def dataset(self, key: str, build: Callable[[], object]):
+        """A Hugging Face ``Dataset`` saved as Arrow files; cached entries are loaded memory-mapped."""
+        entry = self._entry("dataset", key)
+        if self.enabled and entry.exists():
+            from datasets import load_from_disk
+
+            return load_from_disk(str(entry))
+        ds = build()
+        if self.enabled:
+            self._store(entry, lambda d: ds.save_to_disk(str(d)))
+        return ds
+
+    def fitted(self, key: str, build: Callable[[], object]) -> object:
+        entry = self._entry("fitted", key)
+        if self.enabled and entry.exists():
+            return joblib.load(entry / "object.joblib")
+        obj = build()
+        if self.enabled:
+            self._store(entry, lambda d: joblib.dump(obj, d / "object.joblib"))
+        return obj
+
+
+def cached_training_features(
+    store: FeatureStore, data_key: str, df_train: pd.DataFrame, params: Optional[dict] = None
+) -> Tuple[object, csr_matrix]:
+    """Fitted TF-IDF vectorizer (``params`` override the defaults) and training matrix, rebuilt only if the data or config changed."""
+    params = params or {}
+    key = config_key("train", data_key, vectorizer_config(build_tfidf_vectorizer(**params)))
+    fitted = {}
+
+    def fit():
+        vectorizer = build_tfidf_vectorizer(**params)
+        fitted["x_train"] = prepare_features(df_train, vectorizer, fit=True)
+        return vectorizer
+
+    vectorizer = store.fitted(key, fit)
+    x_train = store.matrix(key, lambda: fitted["x_train"] if fitted else prepare_features(df_train, vectorizer, fit=False))
+    return vectorizer, x_train
+
+
+def cached_features(store: FeatureStore, data_key: str, split: str, df: pd.DataFrame, vectorizer) -> csr_matrix:
+    key = config_key(split, data_key, vectorizer_config(vectorizer))
+    return store.matrix(key, lambda: prepare_features(df, vectorizer, fit=False))
+
+
+def frame_digest(df: pd.DataFrame) -> str:
+    """Content hash of a frame's values (not its index), for caching derived data of in-memory splits."""
+    return hashlib.sha256(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes()).hexdigest()
+
+
+def cached_preprocess(
+    store: FeatureStore, data_path: Path, build: Callable[[], pd.DataFrame], options: Optional[dict] = None
+) -> Tuple[str, pd.DataFrame]:
+    """Preprocessed frame plus the data key for downstream caches; ``options`` that change the rows (e.g. dedup) are part of the key."""
+    data_key = file_digest(data_path)
+    if options:
+        data_key = config_key(data_key, options)
+    return data_key, store.frame(config_key("preprocessed", data_key), build)
@@ -0,0 +1,104 @@
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.linear_model import SGDClassifier
+
+from .config import LABEL_COLUMN
+from .drift import ReservoirSample, drift_columns, feature_profile
+from .modeling import AUX_FEATURES, predict_with_scores, prepare_features, save_baseline
+from .preprocess import preprocess_frame
+
+
+@dataclass
+class IncrementalResult:
+    model: SGDClassifier
+    vectorizer: HashingVectorizer
+    holdout: pd.DataFrame
+    rows_trained: int
+
+
+def build_hashing_vectorizer(n_features: int = 2**20) -> HashingVectorizer:
+    # Stateless, so chunks can be featurized independently; same n-gram range as the TF-IDF baseline.
+    return HashingVectorizer(ngram_range=(1, 2), n_features=n_features, alternate_sign=False, norm="l2")
+
+
+def scan_label_counts(csv_path: Path, chunk_size: int) -> pd.Series:
+    counts = pd.Series(dtype="int64")
+    for chunk in pd.read_csv(csv_path, usecols=[LABEL_COLUMN], chunksize=chunk_size):
+        counts = counts.add(chunk[LABEL_COLUMN].value_counts(), fill_value=0)
+    return counts.astype("int64")
+
+
+def train_baseline_incremental(
+    csv_path: Path,
+    chunk_size: int = 100_000,
+    holdout_fraction: float = 0.1,
+    max_holdout_rows: int = 200_000,
+    n_features: int = 2**20,
+    random_state: int = 42,
+    n_jobs: Optional[int] = None,
+    persist: bool = True,
+) -> IncrementalResult:
+    """Out-of-core baseline: hashed n-grams + SGD logistic regression fed one CSV chunk at a time.
+
+    Memory is bounded by ``chunk_size`` and ``max_holdout_rows`` rather than the corpus size. A random
+    ``holdout_fraction`` of every chunk is kept aside (up to ``max_holdout_rows``) for evaluation; if that
+    draws nothing, one row of the first multi-row chunk is held out so small inputs still evaluate. The
+    artifacts are written to the same paths as ``train_baseline`` so ``load_baseline`` and the app work unchanged.
+    """
+    label_counts = scan_label_counts(csv_path, chunk_size)
+    classes = np.array(sorted(label_counts.index))
+    # Same "balanced" weighting as train_baseline, computed from the label pre-scan.
+    class_weight = {k: label_counts.sum() / (len(classes) * label_counts[k]) for k in classes}
+
+    vectorizer = build_hashing_vectorizer(n_features)
+    model = SGDClassifier(loss="log_loss", class_weight=class_weight, random_state=random_state)
+    rng = np.random.default_rng(random_state)
+
+    holdout, holdout_rows, rows_trained, nnz_total = [], 0, 0, 0
+    aux_totals = pd.Series(0.0, index=AUX_FEATURES)
+    column_sums = None
+    sketches = {name: ReservoirSample(seed=random_state) for name in ["nnz", *AUX_FEATURES]}
+    for chunk in pd.read_csv(csv_path, chunksize=chunk_size):
+        chunk = preprocess_frame(chunk, n_jobs=n_jobs)
+        held = rng.random(len(chunk)) < holdout_fraction
+        if holdout_rows == 0 and not held.any() and len(chunk) > 1 and max_holdout_rows > 0:
+            held[rng.integers(len(chunk))] = True
+        if holdout_rows < max_holdout_rows and held.any():
+            kept = chunk[held].head(max_holdout_rows - holdout_rows)
+            holdout.append(kept)
+            holdout_rows += len(kept)
+        train = chunk[~held]
+        if train.empty:
+            continue
+
+        x_train = prepare_features(train, vectorizer, fit=False)
+        model.partial_fit(x_train, train[LABEL_COLUMN].values, classes=classes)
+        rows_trained += len(train)
+        nnz_total += int(x_train.getnnz())
+        chunk_sums = np.asarray(x_train.sum(axis=0)).ravel()
+        column_sums = chunk_sums if column_sums is None else column_sums + chunk_sums
+        aux_totals += train.reindex(columns=AUX_FEATURES, fill_value=0.0).sum()
+        for name, values in drift_columns(train, np.empty(0), x_train).items():
+            if name in sketches:
+                sketches[name].update(values)
+
+    if rows_trained == 0:
+        raise ValueError(f"No training rows read from {csv_path}")
+    holdout_df = pd.concat(holdout, ignore_index=True) if holdout else pd.DataFrame()
+    if persist:
+        drift = {name: feature_profile(sketch.values) for name, sketch in sketches.items()}
+        if not holdout_df.empty:
+            # Scores from the final model; mid-training chunk scores would not match live traffic.
+            drift["score"] = feature_profile(predict_with_scores(model, prepare_features(holdout_df, vectorizer))[1])
+        reference_stats = {
+            "tfidf_non_zero_mean": nnz_total / rows_trained,
+            "aux_feature_mean": (aux_totals / rows_trained).to_dict(),
+            "drift": {name: profile for name, profile in drift.items() if profile is not None},
+        }
+        save_baseline(model, vectorizer, reference_stats, feature_means=column_sums / rows_trained)
+    return IncrementalResult(model=model, vectorizer=vectorizer, holdout=holdout_df, rows_trained=rows_trained)
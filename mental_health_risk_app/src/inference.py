@@ -0,0 +1,103 @@
+from typing import TYPE_CHECKING, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .config import LABEL_COLUMN, TEXT_COLUMN, TRANSFORMER_MAX_LENGTH
+from .modeling import predict_with_scores, prepare_feature_blocks
+from .preprocess import preprocess_frame
+from .registry import REGISTRY, get_baseline, get_transformer
+
+if TYPE_CHECKING:
+    from .dedup import ScoreCache
+
+MODEL_NAMES = ["baseline", "transformer", "cascade"]
+
+
+def predict_baseline(model, vectorizer, frame: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+    """Score an already preprocessed frame with the TF-IDF baseline."""
+    return predict_with_scores(model, prepare_feature_blocks(frame, vectorizer, fit=False))
+
+
+def predict_transformer(
+    tokenizer, model, texts: List[str], batch_size: int = 32, padding: str = "bucketed"
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Batched transformer inference.
+
+    ``padding`` is "bucketed" (sort by token length, pad each batch to its longest member), "longest"
+    (pad each batch in input order) or "max_length" (pad everything to TRANSFORMER_MAX_LENGTH).
+    Results are always returned in input order.
+    """
+    if not texts:
+        return np.array([], dtype=object), np.array([], dtype=float)
+    import torch
+
+    fixed = padding == "max_length"
+    encodings = tokenizer(
+        texts, truncation=True, max_length=TRANSFORMER_MAX_LENGTH, padding="max_length" if fixed else False
+    )
+    if padding == "bucketed":
+        order = np.argsort([len(ids) for ids in encodings["input_ids"]], kind="stable")
+    else:
+        order = np.arange(len(texts))
+
+    probs = np.empty((len(texts), model.config.num_labels), dtype=float)
+    with torch.no_grad():
+        for start in range(0, len(texts), batch_size):
+            idx = order[start : start + batch_size]
+            batch = tokenizer.pad({key: [values[i] for i in idx] for key, values in encodings.items()}, return_tensors="pt")
+            probs[idx] = model(**batch).logits.softmax(dim=-1).numpy()
+    label_idx = probs.argmax(axis=1)
+    preds = np.array([model.config.id2label[int(i)] for i in label_idx], dtype=object)
+    return preds, probs[np.arange(len(texts)), label_idx]
+
+
+def score_frame(
+    frame: pd.DataFrame, model_name: str, batch_size: int = 32, backend: str = "pytorch"
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Score a preprocessed frame with a registry-loaded model ("baseline", "transformer" on ``backend``, or "cascade")."""
+    if model_name == "cascade":
+        from .cascade import cascade_predict  # cascade builds on this module
+
+        result = cascade_predict(frame, batch_size=batch_size, backend=backend)
+        return result.predictions, result.scores
+    if model_name == "transformer":
+        tokenizer, model = get_transformer(backend)
+        return predict_transformer(tokenizer, model, frame[TEXT_COLUMN].tolist(), batch_size=batch_size)
+    model, vectorizer = get_baseline()
+    return predict_baseline(model, vectorizer, frame)
+
+
+def model_version(model_name: str, backend: str = "pytorch") -> str:
+    """Content hashes of the artifacts behind ``model_name``; cached results are only valid for one version."""
+    names = {"baseline": ["baseline"], "transformer": [f"transformer:{backend}"]}.get(model_name)
+    if names is None:
+        from .cascade import get_cascade_band
+
+        names = ["baseline", f"transformer:{backend}"]
+        band = get_cascade_band()
+        return ":".join([*(REGISTRY.version(name)[:16] for name in names), f"{band['threshold']}/{band['band']}"])
+    return ":".join(REGISTRY.version(name)[:16] for name in names)
+
+
+def score_texts(
+    texts: List[str],
+    model_name: str,
+    batch_size: int = 32,
+    backend: str = "pytorch",
+    cache: Optional["ScoreCache"] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Preprocess and score raw texts; with a ``cache``, only texts it has not seen (or near-copies of) are scored."""
+    if cache is not None:
+        version = model_version(model_name, backend)
+        cached = cache.lookup(texts, version)
+        missing = [i for i, hit in enumerate(cached) if hit is None]
+        preds = np.array([hit[0] if hit else None for hit in cached], dtype=object)
+        scores = np.array([hit[1] if hit else np.nan for hit in cached], dtype=float)
+        if missing:
+            new_texts = [texts[i] for i in missing]
+            preds[missing], scores[missing] = score_texts(new_texts, model_name, batch_size=batch_size, backend=backend)
+            cache.put(new_texts, version, preds[missing], scores[missing])
+        return preds, scores
+    frame = pd.DataFrame({TEXT_COLUMN: texts, LABEL_COLUMN: "unknown"})
+    return score_frame(preprocess_frame(frame, n_jobs=1), model_name, batch_size=batch_size, backend=backend)
@@ -1,6 +1,7 @@
 import json
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, Tuple
+from typing import Dict, List, Optional, Tuple
 
 import joblib
 import numpy as np
@@ -17,9 +18,18 @@ from sklearn.metrics import (
 )
 from sklearn.svm import LinearSVC
 from sklearn.utils.class_weight import compute_class_weight
-from scipy.sparse import csr_matrix, hstack
+from scipy.sparse import csr_matrix
+from scipy.special import expit, softmax
 
-from .config import BASELINE_MODEL_PATH, LABEL_COLUMN, REFERENCE_STATS_PATH, TEXT_COLUMN, VECTORIZER_PATH
+from .config import (
+    BASELINE_MODEL_PATH,
+    FEATURE_MEANS_PATH,
+    LABEL_COLUMN,
+    LOW_RISK_LABELS,
+    REFERENCE_STATS_PATH,
+    TEXT_COLUMN,
+    VECTORIZER_PATH,
+)
 
 AUX_FEATURES = [
     "sent_neg",
@@ -33,60 +43,215 @@ AUX_FEATURES = [
 ]
 
 
-def build_tfidf_vectorizer() -> TfidfVectorizer:
-    return TfidfVectorizer(ngram_range=(1, 2), min_df=2, max_df=0.95, max_features=30000)
+TFIDF_PARAMS = {"ngram_range": (1, 2), "min_df": 2, "max_df": 0.95, "max_features": 30000}
+
+
+def build_tfidf_vectorizer(**overrides) -> TfidfVectorizer:
+    return TfidfVectorizer(**{**TFIDF_PARAMS, **overrides})
+
+
+def feature_names(vectorizer, indices) -> List[str]:
+    """Names for columns of the ``prepare_features`` matrix; hashed n-grams have no inverse, so they get bucket ids."""
+    if hasattr(vectorizer, "get_feature_names_out"):
+        vocab = vectorizer.get_feature_names_out()
+        n_text = len(vocab)
+        text_name = lambda i: str(vocab[i])
+    else:
+        n_text = vectorizer.n_features
+        text_name = lambda i: f"hash_{i}"
+    return [text_name(i) if i < n_text else AUX_FEATURES[i - n_text] for i in map(int, indices)]
+
+
+@dataclass
+class FeatureBlocks:
+    """The two halves of a ``prepare_features`` matrix: sparse text features and the dense aux columns."""
+
+    text: csr_matrix
+    aux: np.ndarray
+
+    def row_nnz(self) -> np.ndarray:
+        return self.text.getnnz(axis=1) + np.count_nonzero(self.aux, axis=1)
+
+    def tocsr(self) -> csr_matrix:
+        return stack_blocks(self.text, self.aux)
 
 
-def prepare_features(df: pd.DataFrame, vectorizer: TfidfVectorizer, fit: bool = False) -> csr_matrix:
+def stack_blocks(x_text, x_aux: np.ndarray) -> csr_matrix:
+    """``hstack([x_text, x_aux])`` as CSR, written straight into preallocated index/data arrays.
+
+    Zero aux values are not stored, so the result is identical to the sparse hstack it replaces.
+    """
+    x_text = csr_matrix(x_text)
+    n_rows, n_text = x_text.shape
+    aux_rows, aux_cols = np.nonzero(x_aux)
+    text_counts = np.diff(x_text.indptr)
+    aux_counts = np.bincount(aux_rows, minlength=n_rows)
+    nnz = x_text.nnz + aux_rows.size
+    index_dtype = np.int32 if max(nnz, n_text + x_aux.shape[1]) < 2**31 else np.int64
+    indptr = np.zeros(n_rows + 1, dtype=index_dtype)
+    np.cumsum(text_counts + aux_counts, out=indptr[1:])
+    indices = np.empty(nnz, dtype=index_dtype)
+    data = np.empty(nnz, dtype=np.result_type(x_text.dtype, x_aux.dtype))
+
+    # Each row is its text entries followed by its non-zero aux entries.
+    text_pos = np.arange(x_text.nnz) + np.repeat(indptr[:-1] - x_text.indptr[:-1], text_counts)
+    indices[text_pos] = x_text.indices
+    data[text_pos] = x_text.data
+    aux_rank = np.arange(aux_rows.size) - np.repeat(np.cumsum(aux_counts) - aux_counts, aux_counts)
+    aux_pos = (indptr[:-1] + text_counts)[aux_rows] + aux_rank
+    indices[aux_pos] = aux_cols + n_text
+    data[aux_pos] = x_aux[aux_rows, aux_cols]
+    return csr_matrix((data, indices, indptr), shape=(n_rows, n_text + x_aux.shape[1]))
+
+
+def prepare_feature_blocks(df: pd.DataFrame, vectorizer: TfidfVectorizer, fit: bool = False, dtype=np.float64) -> FeatureBlocks:
     text = df[TEXT_COLUMN].fillna("")
     x_text = vectorizer.fit_transform(text) if fit else vectorizer.transform(text)
-    aux = df.reindex(columns=AUX_FEATURES, fill_value=0.0).astype(float)
-    x_aux = csr_matrix(aux.values)
-    return hstack([x_text, x_aux])
+    aux = df.reindex(columns=AUX_FEATURES, fill_value=0.0).to_numpy(dtype=dtype)
+    return FeatureBlocks(text=csr_matrix(x_text).astype(dtype, copy=False), aux=aux)
 
 
-def train_baseline(df_train: pd.DataFrame, model_type: str = "logreg"):
-    vectorizer = build_tfidf_vectorizer()
-    x_train = prepare_features(df_train, vectorizer, fit=True)
-    y_train = df_train[LABEL_COLUMN].values
+def prepare_features(df: pd.DataFrame, vectorizer: TfidfVectorizer, fit: bool = False, dtype=np.float64) -> csr_matrix:
+    """TF-IDF text features followed by the ``AUX_FEATURES`` columns; ``dtype=np.float32`` halves the memory."""
+    return prepare_feature_blocks(df, vectorizer, fit=fit, dtype=dtype).tocsr()
+
 
-    classes = np.unique(y_train)
-    weights = compute_class_weight(class_weight="balanced", classes=classes, y=y_train)
-    class_weight = dict(zip(classes, weights))
+def linear_decision(model, blocks: FeatureBlocks) -> np.ndarray:
+    """``model.decision_function`` of the stacked matrix, computed block by block without stacking it."""
+    n_text = blocks.text.shape[1]
+    coef = np.asarray(model.coef_)
+    decision = blocks.text @ coef[:, :n_text].T + blocks.aux @ coef[:, n_text:].T + model.intercept_
+    return decision.ravel() if coef.shape[0] == 1 else decision
+
+
+def fit_linear_model(x_train, y_train: np.ndarray, model_type: str = "logreg", C: float = 1.0, class_weight: Optional[str] = "balanced"):
+    """Fit a logistic regression or linear SVM; ``class_weight`` is "balanced" or None."""
+    if class_weight == "balanced":
+        classes = np.unique(y_train)
+        weights = compute_class_weight(class_weight="balanced", classes=classes, y=y_train)
+        class_weight = dict(zip(classes, weights))
 
     if model_type == "svm":
-        model = LinearSVC(class_weight=class_weight)
+        model = LinearSVC(C=C, class_weight=class_weight)
     else:
-        model = LogisticRegression(max_iter=300, class_weight=class_weight)
+        model = LogisticRegression(C=C, max_iter=300, class_weight=class_weight)
+    return model.fit(x_train, y_train)
+
 
-    model.fit(x_train, y_train)
+def train_baseline(
+    df_train: pd.DataFrame,
+    model_type: str = "logreg",
+    vectorizer=None,
+    x_train=None,
+    persist: bool = True,
+    C: float = 1.0,
+    class_weight: Optional[str] = "balanced",
+    df_val: Optional[pd.DataFrame] = None,
+    x_val=None,
+):
+    """Fit and persist the baseline; pass an already fitted ``vectorizer`` and its ``x_train`` to skip featurization.
+
+    The drift reference for the score comes from predictions on ``df_val`` (features ``x_val`` if given):
+    scores on the training rows are overconfident and would make live PSI alert. Without validation data
+    the reference has no score profile, and the score is not monitored.
+    """
+    if vectorizer is None or x_train is None:
+        vectorizer = build_tfidf_vectorizer()
+        x_train = prepare_features(df_train, vectorizer, fit=True)
+    y_train = df_train[LABEL_COLUMN].values
+    model = fit_linear_model(x_train, y_train, model_type, C=C, class_weight=class_weight)
+    if persist:
+        from .drift import drift_columns, reference_profile
+
+        drift = reference_profile(drift_columns(df_train, np.empty(0), x_train))
+        if df_val is not None and len(df_val):
+            x_val = prepare_features(df_val, vectorizer) if x_val is None else x_val
+            drift.update(reference_profile({"score": predict_with_scores(model, x_val)[1]}))
+        reference_stats = {
+            "tfidf_non_zero_mean": float(x_train.getnnz(axis=1).mean()),
+            "aux_feature_mean": df_train.reindex(columns=AUX_FEATURES, fill_value=0.0).mean().to_dict(),
+            "drift": drift,
+        }
+        save_baseline(model, vectorizer, reference_stats, feature_means=np.asarray(x_train.mean(axis=0)).ravel())
+    return model, vectorizer
+
+
+def save_baseline(model, vectorizer, reference_stats: Dict[str, object], feature_means: Optional[np.ndarray] = None) -> None:
+    """Persist the baseline; ``feature_means`` (training column means) is the SHAP background for explanations."""
     BASELINE_MODEL_PATH.parent.mkdir(parents=True, exist_ok=True)
     joblib.dump(model, BASELINE_MODEL_PATH)
     joblib.dump(vectorizer, VECTORIZER_PATH)
-
-    reference_stats = {
-        "tfidf_non_zero_mean": float(x_train.getnnz(axis=1).mean()),
-        "aux_feature_mean": df_train.reindex(columns=AUX_FEATURES, fill_value=0.0).mean().to_dict(),
-    }
     REFERENCE_STATS_PATH.write_text(json.dumps(reference_stats, indent=2))
-    return model, vectorizer
+    if feature_means is not None:
+        np.save(FEATURE_MEANS_PATH, feature_means)
+    else:
+        FEATURE_MEANS_PATH.unlink(missing_ok=True)
 
 
 def load_baseline() -> Tuple[object, TfidfVectorizer]:
     return joblib.load(BASELINE_MODEL_PATH), joblib.load(VECTORIZER_PATH)
 
 
-def evaluate_model(model, vectorizer, df_eval: pd.DataFrame) -> Dict[str, object]:
-    x_eval = prepare_features(df_eval, vectorizer, fit=False)
-    y_true = df_eval[LABEL_COLUMN].values
-    y_pred = model.predict(x_eval)
+def _decision_probabilities(decision: np.ndarray) -> np.ndarray:
+    """Pseudo-probabilities for margin models: sigmoid for binary, softmax for multiclass."""
+    if decision.ndim == 1:
+        positive = expit(decision)
+        return np.column_stack([1 - positive, positive])
+    return softmax(decision, axis=1)
+
+
+def _block_probabilities(model, blocks: FeatureBlocks) -> np.ndarray:
+    if not hasattr(model, "predict_proba"):
+        return _decision_probabilities(linear_decision(model, blocks))
+    if getattr(model, "loss", "log_loss") != "log_loss":
+        return model.predict_proba(blocks.tocsr())
+    decision = linear_decision(model, blocks)
+    if decision.ndim == 1:
+        return _decision_probabilities(decision)
+    if isinstance(model, LogisticRegression) and getattr(model, "multi_class", "auto") != "ovr" and model.solver != "liblinear":
+        return softmax(decision, axis=1)
+    # One-vs-rest logistic models (SGD, liblinear): per-class sigmoids normalized to sum to one.
+    probs = expit(decision)
+    totals = probs.sum(axis=1, keepdims=True)
+    return np.divide(probs, totals, out=np.full_like(probs, 1 / probs.shape[1]), where=totals > 0)
 
+
+def class_probabilities(model, features) -> np.ndarray:
+    """Per-class probabilities (columns follow ``model.classes_``) for a feature matrix or ``FeatureBlocks``."""
+    if isinstance(features, FeatureBlocks):
+        return _block_probabilities(model, features)
     if hasattr(model, "predict_proba"):
-        y_scores = model.predict_proba(x_eval)
-        roc_auc = roc_auc_score(y_true, y_scores[:, 1]) if y_scores.shape[1] == 2 else roc_auc_score(y_true, y_scores, multi_class="ovr")
-    else:
-        decision = model.decision_function(x_eval)
-        roc_auc = roc_auc_score(y_true, decision)
+        return model.predict_proba(features)
+    return _decision_probabilities(model.decision_function(features))
+
+
+def at_risk_probability(probs: np.ndarray, classes) -> np.ndarray:
+    """Per-row probability mass on the at-risk classes (every class not in ``LOW_RISK_LABELS``).
+
+    Binary models without a configured low-risk label treat their first (sorted) class as low risk.
+    """
+    low = np.isin(np.asarray(classes).astype(str), LOW_RISK_LABELS)
+    if not low.any():
+        if len(classes) != 2:
+            raise ValueError(f"None of the classes {list(classes)} is in LOW_RISK_LABELS {LOW_RISK_LABELS}")
+        low = np.array([True, False])
+    return np.asarray(probs)[:, ~low].sum(axis=1)
+
+
+def predict_with_scores(model, features) -> Tuple[np.ndarray, np.ndarray]:
+    """Predicted labels plus the model's confidence in each predicted label."""
+    probs = class_probabilities(model, features)
+    return model.classes_[probs.argmax(axis=1)], probs.max(axis=1)
+
+
+def evaluate_model(model, vectorizer, df_eval: pd.DataFrame, x_eval=None) -> Dict[str, object]:
+    if x_eval is None:
+        x_eval = prepare_feature_blocks(df_eval, vectorizer, fit=False)
+    y_true = df_eval[LABEL_COLUMN].values
+    # For SVMs these are sigmoid/softmax of the margins: same ranking, and rows sum to one as multiclass AUC needs.
+    y_scores = class_probabilities(model, x_eval)
+    y_pred = model.classes_[y_scores.argmax(axis=1)]
+    roc_auc = roc_auc_score(y_true, y_scores[:, 1]) if y_scores.shape[1] == 2 else roc_auc_score(y_true, y_scores, multi_class="ovr")
 
     return {
         "precision": precision_score(y_true, y_pred, average="weighted", zero_division=0),
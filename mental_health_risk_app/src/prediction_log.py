@@ -0,0 +1,353 @@
+import atexit
+import json
+import logging
+import os
+import socket
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from .config import PREDICTION_LOG_DIR
+from .modeling import AUX_FEATURES
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+LOG_SCHEMA = pa.schema(
+    [
+        ("timestamp", pa.timestamp("us")),
+        ("user_hash", pa.string()),
+        ("prediction", pa.string()),
+        ("confidence", pa.float64()),
+        ("risk_flag", pa.int8()),
+        ("model", pa.string()),
+        # Drift features, so monitors can be re-seeded from the log after a restart.
+        ("nnz", pa.float64()),
+        *[(name, pa.float64()) for name in AUX_FEATURES],
+    ]
+)
+INDEX_FILE = "index.jsonl"
+STREAM_SUFFIX = ".arrows"
+IN_PROGRESS_SUFFIX = ".inprogress"
+SEALED_ROW_GROUP_ROWS = 10_000
+
+logger = logging.getLogger(__name__)
+
+
+@contextmanager
+def file_lock(path: Path):
+    """Exclusive advisory lock on ``path`` shared by every process writing to the same log directory."""
+    with open(path, "a+b") as handle:
+        if fcntl is not None:
+            fcntl.flock(handle, fcntl.LOCK_EX)
+        else:
+            handle.seek(0)
+            msvcrt.locking(handle.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(handle, fcntl.LOCK_UN)
+            else:
+                handle.seek(0)
+                msvcrt.locking(handle.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def _to_naive_utc(value) -> datetime:
+    if value is None:
+        return datetime.now(timezone.utc).replace(tzinfo=None)
+    ts = pd.Timestamp(value)
+    if ts.tzinfo is not None:
+        ts = ts.tz_convert("UTC").tz_localize(None)
+    return ts.to_pydatetime()
+
+
+def _read_stream(path: Path, schema: pa.Schema) -> Tuple[pa.Table, Optional[Exception]]:
+    """Every complete record batch of an Arrow IPC stream, plus the error that cut it short (a torn last write)."""
+    batches, error = [], None
+    try:
+        with pa.OSFile(str(path)) as source, pa.ipc.open_stream(source) as reader:
+            for batch in reader:
+                batches.append(batch)
+    except (pa.ArrowInvalid, OSError) as exc:
+        error = exc
+    return pa.Table.from_batches(batches, schema=schema), error
+
+
+def _seal_segment(segment: Path, schema: pa.Schema) -> int:
+    """Convert an in-progress stream into a sealed Parquet segment and index it; the caller holds the lock.
+
+    Each step is safe to repeat: the Parquet file is replaced atomically and the stream is only deleted
+    after the index entry is written, so a crash in between just seals the same rows again.
+    """
+    table, error = _read_stream(segment, schema)
+    if error is not None and table.num_rows == 0 and segment.stat().st_size > 0:
+        logger.warning("prediction log segment %s has no readable rows: %s", segment.name, error)
+    elif error is not None and table.num_rows:
+        logger.warning("prediction log segment %s ends in a partial write; kept %d rows", segment.name, table.num_rows)
+    if table.num_rows:
+        final = segment.with_name(segment.name[: -len(STREAM_SUFFIX + IN_PROGRESS_SUFFIX)] + ".parquet")
+        partial = final.with_name(final.name + ".tmp")
+        pq.write_table(table, partial, compression="zstd", row_group_size=SEALED_ROW_GROUP_ROWS)
+        os.replace(partial, final)
+        stamps = table.column("timestamp")
+        record = {
+            "file": final.name,
+            "rows": table.num_rows,
+            "min_timestamp": pc.min(stamps).as_py().isoformat(),
+            "max_timestamp": pc.max(stamps).as_py().isoformat(),
+        }
+        with open(segment.parent / INDEX_FILE, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
+    segment.unlink()
+    return table.num_rows
+
+
+def _writer_alive(segment: Path, stale_after: float) -> bool:
+    """Whether the process that opened ``segment`` (``<host>-<pid>-<start ms>``) may still be writing it."""
+    host, pid, opened = segment.name[: -len(STREAM_SUFFIX + IN_PROGRESS_SUFFIX)].rsplit("-", 2)
+    if time.time() - int(opened) / 1000 > stale_after:
+        return False
+    if host != socket.gethostname() or fcntl is None or int(pid) == os.getpid():
+        return True
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def recover_segments(
+    directory: Path = PREDICTION_LOG_DIR, stale_after: float = 900.0, schema: pa.Schema = LOG_SCHEMA
+) -> Dict[str, int]:
+    """Seal in-progress segments left behind by writers that died without closing them.
+
+    A segment is orphaned when its process (same host) no longer exists or it was opened more than
+    ``stale_after`` seconds ago (writers seal within ``max_segment_age``). Every batch the writer flushed
+    is recovered; only rows still buffered in memory, or a write torn by the crash, are lost.
+    """
+    directory = Path(directory)
+    counts = {"sealed": 0, "rows": 0}
+    if not directory.exists():
+        return counts
+    with file_lock(directory / ".lock"):
+        for segment in sorted(directory.glob("*" + STREAM_SUFFIX + IN_PROGRESS_SUFFIX)):
+            try:
+                if _writer_alive(segment, stale_after):
+                    continue
+            except ValueError:  # not named by PredictionLogger
+                continue
+            counts["rows"] += _seal_segment(segment, schema)
+            counts["sealed"] += 1
+    if counts["sealed"]:
+        logger.info("recovered %d rows from %d orphaned prediction log segments", counts["rows"], counts["sealed"])
+    return counts
+
+
+class PredictionLogger:
+    """Buffered prediction log written as rotating segments.
+
+    ``log`` only appends to an in-memory buffer; a daemon thread flushes the buffer every
+    ``flush_interval`` seconds (or sooner once ``max_buffer`` rows are waiting) as one record batch
+    appended to an Arrow IPC stream (``<host>-<pid>-<start>.arrows.inprogress``). Each process writes its
+    own segment, so concurrent writers never share a file, and every flushed batch is on disk and readable
+    even if the process is killed. A segment is sealed once it exceeds ``max_segment_bytes`` or is older
+    than ``max_segment_age`` seconds: it is rewritten as a ``.parquet`` file and its row count and
+    timestamp range are appended to ``index.jsonl`` under a file lock. Only sealed segments are visible
+    to readers. Segments orphaned by a crashed writer are sealed on startup (see ``recover_segments``).
+    """
+
+    def __init__(
+        self,
+        directory: Path = PREDICTION_LOG_DIR,
+        flush_interval: float = 1.0,
+        max_buffer: int = 1000,
+        max_segment_bytes: int = 8 << 20,
+        max_segment_age: float = 300.0,
+        schema: pa.Schema = LOG_SCHEMA,
+    ):
+        self.directory = Path(directory)
+        self.flush_interval = flush_interval
+        self.max_buffer = max_buffer
+        self.max_segment_bytes = max_segment_bytes
+        self.max_segment_age = max_segment_age
+        self.schema = schema
+        self._string_fields = [field.name for field in schema if pa.types.is_string(field.type)]
+        self._buffer: List[Dict[str, object]] = []
+        self._buffer_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._closed = threading.Event()
+        self._sink: Optional[pa.OSFile] = None
+        self._writer: Optional[pa.ipc.RecordBatchStreamWriter] = None
+        self._segment: Optional[Path] = None
+        self._segment_opened = 0.0
+        recover_segments(self.directory, stale_after=2 * max_segment_age + 60 * flush_interval, schema=schema)
+        self._thread = threading.Thread(target=self._run, name="prediction-log", daemon=True)
+        self._thread.start()
+
+    def log(self, entry: Dict[str, object]) -> None:
+        row = {name: entry.get(name) for name in self.schema.names}
+        # Labels may be numeric (e.g. 0/1); the schema stores them as strings.
+        for name in self._string_fields:
+            if row[name] is not None:
+                row[name] = str(row[name])
+        row["timestamp"] = _to_naive_utc(entry.get("timestamp"))
+        with self._buffer_lock:
+            self._buffer.append(row)
+            full = len(self._buffer) >= self.max_buffer
+        if full:
+            self._wake.set()
+
+    def flush(self, seal: bool = False) -> None:
+        """Write buffered rows now; ``seal`` also closes the current segment so readers can see it."""
+        with self._write_lock:
+            with self._buffer_lock:
+                rows, self._buffer = self._buffer, []
+            if rows:
+                self._write(rows)
+            if self._writer is not None and (seal or self._should_rotate()):
+                self._seal()
+
+    def close(self) -> None:
+        if self._closed.is_set():
+            return
+        self._closed.set()
+        self._wake.set()
+        self._thread.join()
+        self.flush(seal=True)
+
+    def _run(self) -> None:
+        while not self._closed.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception:  # keep the flusher alive for later batches
+                logger.exception("prediction log flush failed")
+
+    def _write(self, rows: List[Dict[str, object]]) -> None:
+        table = pa.Table.from_pylist(rows, schema=self.schema)
+        if self._writer is None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            self._segment_opened = time.time()
+            name = f"{socket.gethostname()}-{os.getpid()}-{int(self._segment_opened * 1000)}"
+            self._segment = self.directory / (name + STREAM_SUFFIX + IN_PROGRESS_SUFFIX)
+            # OSFile is unbuffered: each batch reaches the file as soon as it is written.
+            self._sink = pa.OSFile(str(self._segment), "wb")
+            self._writer = pa.ipc.new_stream(self._sink, self.schema)
+        self._writer.write_table(table)
+
+    def _should_rotate(self) -> bool:
+        age = time.time() - self._segment_opened
+        return age >= self.max_segment_age or self._segment.stat().st_size >= self.max_segment_bytes
+
+    def _seal(self) -> None:
+        self._writer.close()
+        self._sink.close()
+        with file_lock(self.directory / ".lock"):
+            _seal_segment(self._segment, self.schema)
+        self._sink, self._writer, self._segment = None, None, None
+
+
+def _segments(directory: Path, start: Optional[datetime], end: Optional[datetime]) -> List[Path]:
+    """Sealed segments whose timestamp range overlaps [start, end), pruned via the index when possible."""
+    if not directory.exists():
+        return []
+    indexed = {}
+    index_path = directory / INDEX_FILE
+    if index_path.exists():
+        with file_lock(directory / ".lock"), open(index_path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    record = json.loads(line)
+                    indexed[record["file"]] = record
+
+    selected = []
+    for path in sorted(directory.glob("*.parquet")):
+        record = indexed.get(path.name)
+        if record is not None:
+            if start is not None and datetime.fromisoformat(record["max_timestamp"]) < start:
+                continue
+            if end is not None and datetime.fromisoformat(record["min_timestamp"]) >= end:
+                continue
+        selected.append(path)
+    return selected
+
+
+def iter_predictions(
+    start=None,
+    end=None,
+    columns: Optional[Sequence[str]] = None,
+    directory: Path = PREDICTION_LOG_DIR,
+) -> Iterator[pd.DataFrame]:
+    """Yield logged predictions with ``start <= timestamp < end`` one row group at a time.
+
+    Segments outside the range are skipped using the index, and row groups within a segment are skipped
+    using their Parquet timestamp statistics, so only the matching part of the log is ever read.
+    """
+    directory = Path(directory)
+    start = _to_naive_utc(start) if start is not None else None
+    end = _to_naive_utc(end) if end is not None else None
+    read_columns = None if columns is None else list(dict.fromkeys(["timestamp", *columns]))
+
+    for path in _segments(directory, start, end):
+        parquet = pq.ParquetFile(path)
+        ts_index = parquet.schema_arrow.get_field_index("timestamp")
+        for i in range(parquet.num_row_groups):
+            stats = parquet.metadata.row_group(i).column(ts_index).statistics
+            if stats is not None and stats.has_min_max:
+                if (start is not None and stats.max < start) or (end is not None and stats.min >= end):
+                    continue
+            frame = parquet.read_row_group(i, columns=read_columns).to_pandas()
+            mask = pd.Series(True, index=frame.index)
+            if start is not None:
+                mask &= frame["timestamp"] >= start
+            if end is not None:
+                mask &= frame["timestamp"] < end
+            frame = frame[mask]
+            if not frame.empty:
+                yield frame if columns is None else frame[list(columns)]
+
+
+def read_predictions(
+    start=None,
+    end=None,
+    columns: Optional[Sequence[str]] = None,
+    directory: Path = PREDICTION_LOG_DIR,
+) -> pd.DataFrame:
+    frames = list(iter_predictions(start, end, columns, directory))
+    if not frames:
+        names = list(columns) if columns is not None else LOG_SCHEMA.names
+        return LOG_SCHEMA.empty_table().select(names).to_pandas()
+    frame = pd.concat(frames, ignore_index=True)
+    if "timestamp" in frame.columns:
+        frame = frame.sort_values("timestamp", kind="stable", ignore_index=True)
+    return frame
+
+
+_LOGGER: Optional[PredictionLogger] = None
+_LOGGER_LOCK = threading.Lock()
+
+
+def get_prediction_logger() -> PredictionLogger:
+    """Process-wide logger, created on first use and sealed at interpreter exit."""
+    global _LOGGER
+    with _LOGGER_LOCK:
+        if _LOGGER is None:
+            _LOGGER = PredictionLogger()
+            atexit.register(_LOGGER.close)
+        return _LOGGER
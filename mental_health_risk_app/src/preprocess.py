@@ -1,12 +1,12 @@
 import re
 import string
 from dataclasses import dataclass
-from typing import Optional
+from itertools import repeat
+from typing import List, Optional
 
 import numpy as np
 import pandas as pd
-from nltk.sentiment import SentimentIntensityAnalyzer
-from sklearn.model_selection import train_test_split
+from sklearn.model_selection import GroupShuffleSplit, train_test_split
 
 from .config import (
     GROUP_COLUMN,
@@ -15,10 +15,29 @@ from .config import (
     TIMESTAMP_COLUMN,
     USER_ID_COLUMN,
 )
+from .sentiment import SENTIMENT_COLUMNS, score_sentiment
 
 URL_PATTERN = re.compile(r"https?://\S+|www\.\S+")
 MENTION_PATTERN = re.compile(r"@\w+")
 WHITESPACE_PATTERN = re.compile(r"\s+")
+PUNCTUATION_PATTERN = re.compile(f"[{re.escape(string.punctuation)}]+")
+PUNCTUATION_TABLE = str.maketrans("", "", string.punctuation)
+# ASCII fast path: one translate both drops punctuation and maps every other ASCII whitespace char to " ".
+_ASCII_WHITESPACE = "\t\n\x0b\x0c\r\x1c\x1d\x1e\x1f"
+_ASCII_CLEAN_TABLE = str.maketrans(_ASCII_WHITESPACE, " " * len(_ASCII_WHITESPACE), string.punctuation)
+# Joins rows into one buffer for whole-column passes; not whitespace, punctuation or a word character.
+_ROW_SEPARATOR = "\x00"
+
+EMOTION_LEXICON = {
+    "sadness": {"sad", "empty", "hopeless", "down", "tired", "alone"},
+    "anxiety": {"anxious", "panic", "worry", "nervous", "stress", "overwhelmed"},
+    "anger": {"angry", "furious", "irritated", "hate"},
+    "joy": {"happy", "grateful", "hopeful", "calm", "better"},
+}
+EMOTION_COLUMNS = [f"emo_{emotion}" for emotion in EMOTION_LEXICON]
+# The lexicons are disjoint, so every token maps to at most one emotion column.
+_TOKEN_TO_EMOTION = {word: i for i, words in enumerate(EMOTION_LEXICON.values()) for word in words}
+_SEPARATOR_CODE = len(EMOTION_LEXICON)
 
 
 @dataclass
@@ -32,41 +51,86 @@ def clean_text(text: str) -> str:
     text = text.lower()
     text = URL_PATTERN.sub(" ", text)
     text = MENTION_PATTERN.sub(" ", text)
-    text = text.translate(str.maketrans("", "", string.punctuation))
+    text = text.translate(PUNCTUATION_TABLE)
     text = WHITESPACE_PATTERN.sub(" ", text).strip()
     return text
 
 
-def add_sentiment_features(df: pd.DataFrame) -> pd.DataFrame:
-    sia = SentimentIntensityAnalyzer()
-    sentiments = df[TEXT_COLUMN].fillna("").apply(sia.polarity_scores)
+def _clean_joined(values: List[str], ascii_only: bool) -> List[str]:
+    buffer = _ROW_SEPARATOR.join(values)
+    if "@" in buffer:
+        buffer = MENTION_PATTERN.sub(" ", buffer)
+    if not ascii_only:
+        buffer = PUNCTUATION_PATTERN.sub("", buffer)
+        return [" ".join(text.split()) for text in buffer.split(_ROW_SEPARATOR)]
+    buffer = buffer.translate(_ASCII_CLEAN_TABLE)
+    while "  " in buffer:
+        buffer = buffer.replace("  ", " ")
+    buffer = buffer.replace(" " + _ROW_SEPARATOR, _ROW_SEPARATOR).replace(_ROW_SEPARATOR + " ", _ROW_SEPARATOR)
+    return buffer.strip(" ").split(_ROW_SEPARATOR)
+
+
+def clean_texts(texts: pd.Series) -> pd.Series:
+    """Column-wise equivalent of ``clean_text``: same output, a few whole-buffer passes instead of one call per row."""
+    values = [text.lower() for text in texts.fillna("").tolist()]
+    if len(values) < 2 or any(_ROW_SEPARATOR in text for text in values):
+        return pd.Series([clean_text(text) for text in values], index=texts.index)
+
+    # URLs can span the row separator (``\S+``), so they are stripped per row, and only where one can occur.
+    values = [URL_PATTERN.sub(" ", text) if "http" in text or "www." in text else text for text in values]
+    # ASCII rows take the str.translate fast path; the rest (emoji, accents) fall back to regex passes.
+    is_ascii = np.fromiter((text.isascii() for text in values), dtype=bool, count=len(values))
+    cleaned = np.empty(len(values), dtype=object)
+    for mask in (is_ascii, ~is_ascii):
+        if mask.any():
+            cleaned[mask] = _clean_joined([text for text, keep in zip(values, mask) if keep], ascii_only=mask is is_ascii)
+    return pd.Series(cleaned, index=texts.index)
+
+
+def add_sentiment_features(df: pd.DataFrame, n_jobs: Optional[int] = None) -> pd.DataFrame:
+    scores = score_sentiment(df[TEXT_COLUMN], n_jobs=n_jobs)
     df = df.copy()
-    for col in ["neg", "neu", "pos", "compound"]:
-        df[f"sent_{col}"] = sentiments.apply(lambda x: x[col])
+    for i, column in enumerate(SENTIMENT_COLUMNS):
+        df[column] = scores[:, i]
     return df
 
 
+def emotion_counts(texts: pd.Series) -> np.ndarray:
+    """Per-row lexicon hit counts, shape (n_rows, n_emotions), from a single tokenize-and-lookup sweep."""
+    values = texts.fillna("").tolist()
+    counts = np.zeros((len(values), len(EMOTION_LEXICON)), dtype=np.int64)
+    buffer = f" {_ROW_SEPARATOR} ".join(values)
+    if buffer.count(_ROW_SEPARATOR) != len(values) - 1:
+        for row, text in enumerate(values):
+            for token in text.split():
+                if token in _TOKEN_TO_EMOTION:
+                    counts[row, _TOKEN_TO_EMOTION[token]] += 1
+        return counts
+
+    lookup = {**_TOKEN_TO_EMOTION, _ROW_SEPARATOR: _SEPARATOR_CODE}
+    tokens = buffer.split()
+    codes = np.fromiter(map(lookup.get, tokens, repeat(-1)), dtype=np.int64, count=len(tokens))
+    rows = np.cumsum(codes == _SEPARATOR_CODE)
+    hits = (codes >= 0) & (codes < _SEPARATOR_CODE)
+    flat = np.bincount(rows[hits] * len(EMOTION_LEXICON) + codes[hits], minlength=counts.size)
+    return flat.reshape(counts.shape)
+
+
 def add_emotion_proxy_features(df: pd.DataFrame) -> pd.DataFrame:
     """Simple lexicon proxies; replace with richer emotion model if available."""
-    emotion_lexicon = {
-        "sadness": {"sad", "empty", "hopeless", "down", "tired", "alone"},
-        "anxiety": {"anxious", "panic", "worry", "nervous", "stress", "overwhelmed"},
-        "anger": {"angry", "furious", "irritated", "hate"},
-        "joy": {"happy", "grateful", "hopeful", "calm", "better"},
-    }
     df = df.copy()
-    tokens = df[TEXT_COLUMN].fillna("").str.split()
-    for emotion, words in emotion_lexicon.items():
-        df[f"emo_{emotion}"] = tokens.apply(lambda tok: sum(1 for t in tok if t in words))
+    counts = emotion_counts(df[TEXT_COLUMN])
+    for i, column in enumerate(EMOTION_COLUMNS):
+        df[column] = counts[:, i]
     return df
 
 
-def preprocess_frame(df: pd.DataFrame) -> pd.DataFrame:
+def preprocess_frame(df: pd.DataFrame, n_jobs: Optional[int] = None) -> pd.DataFrame:
     if TEXT_COLUMN not in df.columns or LABEL_COLUMN not in df.columns:
         raise ValueError(f"Input data must include '{TEXT_COLUMN}' and '{LABEL_COLUMN}' columns")
 
     df = df.copy()
-    df[TEXT_COLUMN] = df[TEXT_COLUMN].fillna("").apply(clean_text)
+    df[TEXT_COLUMN] = clean_texts(df[TEXT_COLUMN])
     if TIMESTAMP_COLUMN in df.columns:
         df[TIMESTAMP_COLUMN] = pd.to_datetime(df[TIMESTAMP_COLUMN], errors="coerce")
     if USER_ID_COLUMN not in df.columns:
@@ -74,7 +138,7 @@ def preprocess_frame(df: pd.DataFrame) -> pd.DataFrame:
     if GROUP_COLUMN not in df.columns:
         df[GROUP_COLUMN] = "unknown"
 
-    df = add_sentiment_features(df)
+    df = add_sentiment_features(df, n_jobs=n_jobs)
     df = add_emotion_proxy_features(df)
     return df
 
@@ -85,7 +149,15 @@ def split_dataset(
     val_size: float = 0.15,
     random_state: int = 42,
     stratify: bool = True,
+    groups: Optional[str] = None,
 ) -> DatasetBundle:
+    """Train/val/test split; with ``groups`` (a column name) every group lands in exactly one split.
+
+    Group-aware splits (e.g. on ``DUPLICATE_GROUP_COLUMN``) are not stratified, and the sizes are fractions
+    of groups rather than rows.
+    """
+    if groups is not None:
+        return _group_split(df, groups, test_size, val_size, random_state)
     strat = df[LABEL_COLUMN] if stratify else None
     train_val, test = train_test_split(
         df, test_size=test_size, random_state=random_state, stratify=strat
@@ -98,6 +170,19 @@ def split_dataset(
     return DatasetBundle(train=train.reset_index(drop=True), val=val.reset_index(drop=True), test=test.reset_index(drop=True))
 
 
+def _group_split(df: pd.DataFrame, groups: str, test_size: float, val_size: float, random_state: int) -> DatasetBundle:
+    outer = GroupShuffleSplit(n_splits=1, test_size=test_size, random_state=random_state)
+    train_val_idx, test_idx = next(outer.split(df, groups=df[groups]))
+    train_val = df.iloc[train_val_idx]
+    inner = GroupShuffleSplit(n_splits=1, test_size=val_size / (1 - test_size), random_state=random_state)
+    train_idx, val_idx = next(inner.split(train_val, groups=train_val[groups]))
+    return DatasetBundle(
+        train=train_val.iloc[train_idx].reset_index(drop=True),
+        val=train_val.iloc[val_idx].reset_index(drop=True),
+        test=df.iloc[test_idx].reset_index(drop=True),
+    )
+
+
 def handle_class_imbalance(labels: pd.Series) -> dict:
     counts = labels.value_counts().to_dict()
     total = len(labels)
@@ -0,0 +1,155 @@
+import hashlib
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .config import BASELINE_MODEL_PATH, VECTORIZER_PATH
+from .modeling import load_baseline
+from .transformer_backends import BACKENDS, backend_artifacts, load_backend
+
+
+def _rss_bytes() -> int:
+    """Current resident set size of this process (0 if the platform does not expose it)."""
+    try:
+        with open("/proc/self/statm", "r", encoding="ascii") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+
+        # ru_maxrss is a high-water mark (KiB on Linux, bytes on macOS) but better than nothing.
+        return int(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss) * 1024
+    except ImportError:
+        return 0
+
+
+def _artifact_files(paths: List[Path]) -> List[Path]:
+    files = []
+    for path in paths:
+        if path.is_dir():
+            # Top level only: the Trainer writes checkpoint-* subfolders next to the final model.
+            files.extend(sorted(p for p in path.iterdir() if p.is_file()))
+        elif path.exists():
+            files.append(path)
+    return files
+
+
+def _stat_signature(files: List[Path]) -> Tuple[Tuple[str, int, int], ...]:
+    return tuple((str(p), p.stat().st_mtime_ns, p.stat().st_size) for p in files)
+
+
+def _content_hash(files: List[Path]) -> str:
+    digest = hashlib.sha256()
+    for path in files:
+        digest.update(str(path).encode())
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+    return digest.hexdigest()
+
+
+@dataclass
+class RegistryEntry:
+    value: object
+    stat_signature: Tuple[Tuple[str, int, int], ...]
+    content_hash: str
+    load_seconds: float
+    rss_delta_bytes: int
+    loaded_at: float = field(default_factory=time.time)
+
+
+class ModelRegistry:
+    """Loads model artifacts once per process and reloads them only when they change on disk.
+
+    Freshness is checked cheaply via mtime/size on every ``get``; the (expensive) content hash
+    is only recomputed when that signature moves, so touching a file without changing it does
+    not trigger a reload.
+    """
+
+    def __init__(self):
+        self._loaders: Dict[str, Tuple[List[Path], Callable[[], object]]] = {}
+        self._entries: Dict[str, RegistryEntry] = {}
+        self._lock = threading.RLock()
+
+    def register(self, name: str, paths: List[Path], loader: Callable[[], object]) -> None:
+        with self._lock:
+            self._loaders[name] = (list(paths), loader)
+            self._entries.pop(name, None)
+
+    def get(self, name: str):
+        paths, loader = self._loaders[name]
+        with self._lock:
+            files = _artifact_files(paths)
+            if not files:
+                raise FileNotFoundError(f"No artifacts found for '{name}' at {', '.join(map(str, paths))}")
+            signature = _stat_signature(files)
+            entry = self._entries.get(name)
+            if entry is not None and entry.stat_signature == signature:
+                return entry.value
+
+            content_hash = _content_hash(files)
+            if entry is not None and entry.content_hash == content_hash:
+                entry.stat_signature = signature
+                return entry.value
+
+            self._entries.pop(name, None)
+            rss_before = _rss_bytes()
+            start = time.perf_counter()
+            value = loader()
+            self._entries[name] = RegistryEntry(
+                value=value,
+                stat_signature=signature,
+                content_hash=content_hash,
+                load_seconds=time.perf_counter() - start,
+                rss_delta_bytes=max(0, _rss_bytes() - rss_before),
+            )
+            return value
+
+    def version(self, name: str) -> str:
+        """Content hash of the artifacts currently loaded for ``name`` (loading or reloading them if needed)."""
+        self.get(name)
+        with self._lock:
+            return self._entries[name].content_hash
+
+    def invalidate(self, name: Optional[str] = None) -> None:
+        with self._lock:
+            if name is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(name, None)
+
+    def stats(self) -> Dict[str, Dict[str, object]]:
+        with self._lock:
+            return {
+                name: {
+                    "load_seconds": entry.load_seconds,
+                    "rss_mb": entry.rss_delta_bytes / (1024 * 1024),
+                    "content_hash": entry.content_hash[:12],
+                    "loaded_at": entry.loaded_at,
+                }
+                for name, entry in self._entries.items()
+            }
+
+
+def _transformer_loader(backend: str) -> Callable[[], object]:
+    return lambda: load_backend(backend)
+
+
+# Module-level singleton: Streamlit keeps imported modules alive for the whole server process,
+# so every session shares the same loaded artifacts.
+REGISTRY = ModelRegistry()
+REGISTRY.register("baseline", [BASELINE_MODEL_PATH, VECTORIZER_PATH], load_baseline)
+for _backend in BACKENDS:
+    REGISTRY.register(f"transformer:{_backend}", backend_artifacts(_backend), _transformer_loader(_backend))
+
+
+def get_baseline():
+    return REGISTRY.get("baseline")
+
+
+def get_transformer(backend: str = "pytorch"):
+    return REGISTRY.get(f"transformer:{backend}")
@@ -0,0 +1,91 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+
+from .cache import LRUCache, content_hash
+
+SENTIMENT_KEYS = ["neg", "neu", "pos", "compound"]
+SENTIMENT_COLUMNS = [f"sent_{key}" for key in SENTIMENT_KEYS]
+# Below this many uncached texts, pool start-up costs more than it saves.
+PARALLEL_MIN_TEXTS = 20_000
+CHUNKS_PER_WORKER = 4
+
+SENTIMENT_CACHE = LRUCache(maxsize=500_000)
+_analyzer = None
+
+
+def available_cpus() -> int:
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def ensure_vader_lexicon() -> None:
+    """Download the VADER lexicon if missing (nltk is imported here, not at module import)."""
+    import nltk
+
+    nltk.download("vader_lexicon", quiet=True)
+
+
+def _get_analyzer():
+    # One analyzer per process: loading the VADER lexicon is the expensive part.
+    global _analyzer
+    if _analyzer is None:
+        from nltk.sentiment import SentimentIntensityAnalyzer
+
+        _analyzer = SentimentIntensityAnalyzer()
+    return _analyzer
+
+
+def _score_texts(texts: List[str]) -> np.ndarray:
+    sia = _get_analyzer()
+    scores = np.empty((len(texts), len(SENTIMENT_KEYS)), dtype=float)
+    for i, text in enumerate(texts):
+        polarity = sia.polarity_scores(text)
+        scores[i] = [polarity[key] for key in SENTIMENT_KEYS]
+    return scores
+
+
+def _score_parallel(texts: List[str], n_jobs: int) -> np.ndarray:
+    n_chunks = n_jobs * CHUNKS_PER_WORKER
+    size = -(-len(texts) // n_chunks)
+    chunks = [texts[start : start + size] for start in range(0, len(texts), size)]
+    with ProcessPoolExecutor(max_workers=n_jobs, initializer=_get_analyzer) as pool:
+        return np.vstack(list(pool.map(_score_texts, chunks)))
+
+
+def score_sentiment(texts: pd.Series, n_jobs: Optional[int] = None, cache: Optional[LRUCache] = SENTIMENT_CACHE) -> np.ndarray:
+    """VADER (neg, neu, pos, compound) per row as an (n_rows, 4) array.
+
+    Each distinct text is scored once; results are kept in a content-hash LRU cache so reposts and
+    repeated runs over the same corpus skip VADER entirely. Large batches of uncached texts are
+    spread over a process pool (``n_jobs`` workers, default: all available cores; ``n_jobs=1`` stays serial).
+    """
+    codes, uniques = pd.factorize(texts.fillna(""))
+    uniques = list(uniques)
+    keys = [content_hash(text) for text in uniques] if cache is not None else []
+    scores = np.empty((len(uniques), len(SENTIMENT_KEYS)), dtype=float)
+
+    missing = []
+    for i, key in enumerate(keys):
+        cached = cache.get(key)
+        if cached is None:
+            missing.append(i)
+        else:
+            scores[i] = cached
+    if cache is None:
+        missing = list(range(len(uniques)))
+
+    if missing:
+        todo = [uniques[i] for i in missing]
+        n_jobs = n_jobs or available_cpus()
+        fresh = _score_parallel(todo, n_jobs) if n_jobs > 1 and len(todo) >= PARALLEL_MIN_TEXTS else _score_texts(todo)
+        scores[missing] = fresh
+        if cache is not None:
+            for i, row in zip(missing, fresh):
+                cache.put(keys[i], tuple(row))
+    return scores[codes]
@@ -0,0 +1,103 @@
+import itertools
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+from sklearn.metrics import accuracy_score, f1_score
+
+from .config import LABEL_COLUMN
+from .feature_store import FeatureStore, cached_features, cached_training_features, load_csr, save_csr
+from .modeling import fit_linear_model, predict_with_scores
+from .sentiment import available_cpus
+
+# Overrides on top of modeling.TFIDF_PARAMS; each distinct config is fitted exactly once.
+VECTORIZER_GRID = [
+    {},
+    {"ngram_range": (1, 1), "max_features": 20000},
+    {"max_features": 60000, "sublinear_tf": True},
+]
+MODEL_GRID = {
+    "model_type": ["logreg", "svm"],
+    "C": [0.1, 1.0, 10.0],
+    "class_weight": ["balanced", None],
+}
+
+
+@dataclass
+class SweepResult:
+    trials: List[Dict[str, object]]  # best first
+    vectorizers: List[Dict[str, object]]
+
+    @property
+    def best(self) -> Dict[str, object]:
+        return self.trials[0]
+
+
+def _run_trial(matrix_dir: str, y_train: np.ndarray, y_val: np.ndarray, params: Dict[str, object]) -> Dict[str, object]:
+    # Memory-mapped: every worker reads the same pages from the OS cache instead of its own pickled copy.
+    x_train = load_csr(Path(matrix_dir) / "train")
+    x_val = load_csr(Path(matrix_dir) / "val")
+    start = time.perf_counter()
+    model = fit_linear_model(x_train, y_train, params["model_type"], C=params["C"], class_weight=params["class_weight"])
+    fit_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    y_pred, _ = predict_with_scores(model, x_val)
+    predict_seconds = time.perf_counter() - start
+    return {
+        **params,
+        "val_f1": float(f1_score(y_val, y_pred, average="weighted", zero_division=0)),
+        "val_macro_f1": float(f1_score(y_val, y_pred, average="macro", zero_division=0)),
+        "val_accuracy": float(accuracy_score(y_val, y_pred)),
+        "fit_seconds": fit_seconds,
+        "predict_seconds": predict_seconds,
+    }
+
+
+def run_sweep(
+    df_train: pd.DataFrame,
+    df_val: pd.DataFrame,
+    vectorizer_grid: List[Dict[str, object]] = VECTORIZER_GRID,
+    model_grid: Dict[str, list] = MODEL_GRID,
+    n_jobs: Optional[int] = None,
+    store: Optional[FeatureStore] = None,
+    data_key: str = "",
+) -> SweepResult:
+    """Grid search over vectorizer configs x (model type, C, class weight), ranked by weighted F1 on ``df_val``.
+
+    Vectorizers are fitted in this process (through ``store`` when given, so reruns reuse them); the
+    resulting matrices are written once as raw .npy arrays and memory-mapped by the worker processes.
+    """
+    store = store or FeatureStore(enabled=False)
+    y_train, y_val = df_train[LABEL_COLUMN].to_numpy(), df_val[LABEL_COLUMN].to_numpy()
+    combos = [dict(zip(model_grid, values)) for values in itertools.product(*model_grid.values())]
+    n_jobs = n_jobs or available_cpus()
+
+    vectorizers, trials = [], []
+    with tempfile.TemporaryDirectory(prefix="sweep-") as workdir:
+        for i, params in enumerate(vectorizer_grid):
+            start = time.perf_counter()
+            vectorizer, x_train = cached_training_features(store, data_key, df_train, params)
+            x_val = cached_features(store, data_key, "val", df_val, vectorizer)
+            matrix_dir = Path(workdir) / f"vectorizer-{i}"
+            save_csr(x_train, matrix_dir / "train")
+            save_csr(x_val, matrix_dir / "val")
+            vectorizers.append(
+                {"vectorizer": i, "params": params, "n_features": int(x_train.shape[1]), "fit_seconds": time.perf_counter() - start}
+            )
+
+        with ProcessPoolExecutor(max_workers=n_jobs) as pool:
+            futures = {
+                pool.submit(_run_trial, str(Path(workdir) / f"vectorizer-{i}"), y_train, y_val, combo): i
+                for i in range(len(vectorizer_grid))
+                for combo in combos
+            }
+            for future in as_completed(futures):
+                trials.append({"vectorizer": futures[future], **future.result()})
+
+    trials.sort(key=lambda t: (-t["val_f1"], t["fit_seconds"]))
+    return SweepResult(trials=trials, vectorizers=vectorizers)
@@ -0,0 +1,149 @@
+import inspect
+import time
+import warnings
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Dict, List
+
+import numpy as np
+from sklearn.metrics import f1_score
+
+from .config import ONNX_DIR, TRANSFORMER_DIR
+
+# "pytorch" is the FP32 model as trained; the others trade a little accuracy for CPU latency and memory.
+# torch / transformers / onnxruntime are imported inside the functions that need them.
+BACKENDS = ["pytorch", "pytorch-int8", "onnx", "onnx-int8"]
+ONNX_MODEL_FILES = {"onnx": "model.onnx", "onnx-int8": "model.int8.onnx"}
+
+
+def quantize_pytorch(model):
+    """Dynamic int8 quantization of all Linear layers (weights int8, activations quantized on the fly).
+
+    Recent torch releases flag all of ``torch.ao.quantization`` as deprecated in favour of torchao, which
+    is not a dependency; those warnings are silenced for this call only.
+    """
+    import torch
+
+    with warnings.catch_warnings():
+        warnings.filterwarnings("ignore", message=".*quantiz.*deprecated", category=DeprecationWarning)
+        warnings.filterwarnings("ignore", message=".*quantiz.*deprecated", category=UserWarning)
+        return torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+class OnnxSequenceClassifier:
+    """ONNX Runtime session behind the same call signature the inference code uses for the PyTorch model."""
+
+    def __init__(self, model_path: Path, config, threads: int = 0):
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(str(model_path), options, providers=["CPUExecutionProvider"])
+        self.input_names = {i.name for i in self.session.get_inputs()}
+        self.config = config
+
+    def eval(self):
+        return self
+
+    def __call__(self, **inputs):
+        import torch
+
+        feed = {k: v.numpy() if hasattr(v, "numpy") else np.asarray(v) for k, v in inputs.items() if k in self.input_names}
+        logits = self.session.run(["logits"], feed)[0]
+        return SimpleNamespace(logits=torch.from_numpy(logits), attentions=None)
+
+
+def export_onnx(model_dir: Path = TRANSFORMER_DIR, output_dir: Path = ONNX_DIR, quantize: bool = True) -> Dict[str, Path]:
+    """Export the fine-tuned model to ONNX (and a dynamically int8-quantized copy) next to its tokenizer/config."""
+    import torch
+    from transformers import AutoConfig, AutoModelForSequenceClassification, AutoTokenizer
+
+    output_dir.mkdir(parents=True, exist_ok=True)
+    tokenizer = AutoTokenizer.from_pretrained(str(model_dir))
+    model = AutoModelForSequenceClassification.from_pretrained(str(model_dir))
+    model.eval()
+    model.config.return_dict = False
+
+    sample = tokenizer(["export sample text"], return_tensors="pt")
+    dynamic = {0: "batch", 1: "sequence"}
+    # Newer torch defaults to the dynamo exporter; the TorchScript exporter handles HF models without extra deps.
+    kwargs = {"dynamo": False} if "dynamo" in inspect.signature(torch.onnx.export).parameters else {}
+    fp32_path = output_dir / ONNX_MODEL_FILES["onnx"]
+    torch.onnx.export(
+        model,
+        (sample["input_ids"], sample["attention_mask"]),
+        str(fp32_path),
+        input_names=["input_ids", "attention_mask"],
+        output_names=["logits"],
+        dynamic_axes={"input_ids": dynamic, "attention_mask": dynamic, "logits": {0: "batch"}},
+        opset_version=14,
+        **kwargs,
+    )
+    tokenizer.save_pretrained(str(output_dir))
+    AutoConfig.from_pretrained(str(model_dir)).save_pretrained(str(output_dir))
+    paths = {"onnx": fp32_path}
+
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        int8_path = output_dir / ONNX_MODEL_FILES["onnx-int8"]
+        quantize_dynamic(str(fp32_path), str(int8_path), weight_type=QuantType.QInt8)
+        paths["onnx-int8"] = int8_path
+    return paths
+
+
+def load_backend(backend: str):
+    """(tokenizer, model) for ``backend``; only the PyTorch backends can return attentions (``output_attentions=True`` per call).
+
+    PyTorch models load with eager attention: sdpa returns no attention weights, and the app shows them.
+    """
+    from transformers import AutoConfig, AutoModelForSequenceClassification, AutoTokenizer
+
+    if backend in ONNX_MODEL_FILES:
+        tokenizer = AutoTokenizer.from_pretrained(str(ONNX_DIR))
+        model = OnnxSequenceClassifier(ONNX_DIR / ONNX_MODEL_FILES[backend], AutoConfig.from_pretrained(str(ONNX_DIR)))
+        return tokenizer, model
+    tokenizer = AutoTokenizer.from_pretrained(str(TRANSFORMER_DIR))
+    model = AutoModelForSequenceClassification.from_pretrained(str(TRANSFORMER_DIR), attn_implementation="eager")
+    model.eval()
+    if backend == "pytorch-int8":
+        model = quantize_pytorch(model)
+    return tokenizer, model
+
+
+def backend_artifacts(backend: str) -> List[Path]:
+    if backend in ONNX_MODEL_FILES:
+        return [ONNX_DIR / ONNX_MODEL_FILES[backend], ONNX_DIR / "config.json"]
+    return [TRANSFORMER_DIR]
+
+
+def backend_parity(texts: List[str], labels: np.ndarray, backends: List[str] = BACKENDS, batch_size: int = 32) -> Dict[str, Dict[str, float]]:
+    """Accuracy parity, latency and memory of each backend against the FP32 PyTorch model on labelled texts."""
+    from .inference import predict_transformer
+    from .registry import REGISTRY, get_transformer
+
+    report, reference = {}, None
+    for backend in ["pytorch"] + [b for b in backends if b != "pytorch"]:
+        tokenizer, model = get_transformer(backend)
+        start = time.perf_counter()
+        preds, _ = predict_transformer(tokenizer, model, texts, batch_size=batch_size)
+        batch_seconds = time.perf_counter() - start
+
+        single = []
+        for text in texts[:50]:
+            start = time.perf_counter()
+            predict_transformer(tokenizer, model, [text])
+            single.append(time.perf_counter() - start)
+
+        if reference is None:
+            reference = preds
+        load = REGISTRY.stats().get(f"transformer:{backend}", {})
+        report[backend] = {
+            "agreement_with_fp32": float(np.mean(preds == reference)),
+            "f1": float(f1_score(labels, preds, average="weighted", zero_division=0)),
+            "batch_rows_per_second": len(texts) / batch_seconds,
+            "single_p50_ms": float(np.median(single) * 1000) if single else 0.0,
+            "load_seconds": load.get("load_seconds", 0.0),
+            "rss_mb": load.get("rss_mb", 0.0),
+        }
+    return report
@@ -1,4 +1,5 @@
-from typing import Dict
+from functools import partial
+from typing import Dict, Optional
 
 import numpy as np
 import pandas as pd
@@ -7,18 +8,26 @@ from sklearn.metrics import precision_recall_fscore_support, roc_auc_score
 from transformers import (
     AutoModelForSequenceClassification,
     AutoTokenizer,
+    DataCollatorWithPadding,
     Trainer,
     TrainingArguments,
 )
 
-from .config import LABEL_COLUMN, TEXT_COLUMN, TRANSFORMER_DIR
+from .config import LABEL_COLUMN, TEXT_COLUMN, TRANSFORMER_DIR, TRANSFORMER_MAX_LENGTH
+from .feature_store import FeatureStore, config_key, frame_digest
+from .sentiment import available_cpus
 
 
 MODEL_NAME = "distilbert-base-uncased"
+# Below this many rows per worker, spawning tokenizer processes costs more than it saves.
+MIN_ROWS_PER_PROC = 2000
 
 
-def _tokenize(tokenizer, batch):
-    return tokenizer(batch[TEXT_COLUMN], truncation=True, padding="max_length", max_length=128)
+def _tokenize(tokenizer, batch, dynamic_padding: bool = True):
+    if dynamic_padding:
+        # Padding happens per batch in the collator; "length" drives the Trainer's length-grouped sampler.
+        return tokenizer(batch[TEXT_COLUMN], truncation=True, max_length=TRANSFORMER_MAX_LENGTH, return_length=True)
+    return tokenizer(batch[TEXT_COLUMN], truncation=True, padding="max_length", max_length=TRANSFORMER_MAX_LENGTH)
 
 
 def _metrics(eval_pred) -> Dict[str, float]:
@@ -38,19 +47,67 @@ def _metrics(eval_pred) -> Dict[str, float]:
     }
 
 
-def fine_tune_transformer(train_df: pd.DataFrame, val_df: pd.DataFrame, label2id: Dict[str, int]):
+def tokenized_dataset(
+    df: pd.DataFrame,
+    tokenizer,
+    label2id: Dict[str, int],
+    dynamic_padding: bool = True,
+    store: Optional[FeatureStore] = None,
+    num_proc: Optional[int] = None,
+) -> Dataset:
+    """Tokenized Arrow dataset for ``df``, cached in ``store`` under the data hash, tokenizer and max length.
+
+    Tokenization runs in ``num_proc`` worker processes (default: available CPUs, fewer for small frames).
+    The input frame is not modified.
+    """
+    store = store or FeatureStore(enabled=False)
+    frame = df[[TEXT_COLUMN, LABEL_COLUMN]].assign(**{LABEL_COLUMN: df[LABEL_COLUMN].map(label2id)})
+    key = config_key(
+        "tokenized",
+        frame_digest(frame),
+        type(tokenizer).__name__,
+        tokenizer.name_or_path,
+        len(tokenizer),
+        TRANSFORMER_MAX_LENGTH,
+        dynamic_padding,
+    )
+
+    def build() -> Dataset:
+        procs = min(num_proc or available_cpus(), max(1, len(frame) // MIN_ROWS_PER_PROC))
+        ds = Dataset.from_pandas(frame, preserve_index=False)
+        # A partial of a module-level function pickles cleanly into the worker processes; a lambda does not.
+        tokenize = partial(_tokenize, tokenizer, dynamic_padding=dynamic_padding)
+        return ds.map(tokenize, batched=True, num_proc=procs if procs > 1 else None)
+
+    return store.dataset(key, build)
+
+
+def fine_tune_transformer(
+    train_df: pd.DataFrame,
+    val_df: pd.DataFrame,
+    label2id: Dict[str, int],
+    dynamic_padding: bool = True,
+    store: Optional[FeatureStore] = None,
+    num_proc: Optional[int] = None,
+    learning_rate: float = 2e-5,
+    num_train_epochs: float = 2,
+):
+    """Fine-tune and save to TRANSFORMER_DIR.
+
+    With ``dynamic_padding`` (default) examples are only padded to the longest sequence in their batch;
+    training batches are drawn from length-grouped buckets and evaluation runs over length-sorted data,
+    so short entries no longer pay for 128 tokens. ``dynamic_padding=False`` restores fixed max-length padding.
+    Tokenized splits are cached in ``store`` (see ``tokenized_dataset``), so reruns skip tokenization,
+    including reruns with other training hyperparameters.
+    """
     tokenizer = AutoTokenizer.from_pretrained(MODEL_NAME)
     num_labels = len(label2id)
     id2label = {v: k for k, v in label2id.items()}
 
-    for df in [train_df, val_df]:
-        df[LABEL_COLUMN] = df[LABEL_COLUMN].map(label2id)
-
-    train_ds = Dataset.from_pandas(train_df[[TEXT_COLUMN, LABEL_COLUMN]])
-    val_ds = Dataset.from_pandas(val_df[[TEXT_COLUMN, LABEL_COLUMN]])
-
-    train_ds = train_ds.map(lambda x: _tokenize(tokenizer, x), batched=True)
-    val_ds = val_ds.map(lambda x: _tokenize(tokenizer, x), batched=True)
+    train_ds = tokenized_dataset(train_df, tokenizer, label2id, dynamic_padding, store=store, num_proc=num_proc)
+    val_ds = tokenized_dataset(val_df, tokenizer, label2id, dynamic_padding, store=store, num_proc=num_proc)
+    if dynamic_padding:
+        val_ds = val_ds.sort("length")
 
     model = AutoModelForSequenceClassification.from_pretrained(
         MODEL_NAME, num_labels=num_labels, label2id=label2id, id2label=id2label
@@ -58,16 +115,17 @@ def fine_tune_transformer(train_df: pd.DataFrame, val_df: pd.DataFrame, label2id
 
     args = TrainingArguments(
         output_dir=str(TRANSFORMER_DIR),
-        evaluation_strategy="epoch",
+        eval_strategy="epoch",
         save_strategy="epoch",
-        learning_rate=2e-5,
+        learning_rate=learning_rate,
         per_device_train_batch_size=16,
         per_device_eval_batch_size=16,
-        num_train_epochs=2,
+        num_train_epochs=num_train_epochs,
         weight_decay=0.01,
         load_best_model_at_end=True,
         metric_for_best_model="f1",
         report_to="none",
+        train_sampling_strategy="group_by_length" if dynamic_padding else "random",
     )
 
     trainer = Trainer(
@@ -75,7 +133,8 @@ def fine_tune_transformer(train_df: pd.DataFrame, val_df: pd.DataFrame, label2id
         args=args,
         train_dataset=train_ds,
         eval_dataset=val_ds,
-        tokenizer=tokenizer,
+        processing_class=tokenizer,
+        data_collator=DataCollatorWithPadding(tokenizer) if dynamic_padding else None,
         compute_metrics=_metrics,
     )
     trainer.train()
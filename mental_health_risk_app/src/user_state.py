@@ -0,0 +1,162 @@
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Optional
+
+import pandas as pd
+
+from .config import USER_EVENT_RETENTION_DAYS, USER_STATE_PATH
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS user_risk (
+    user_hash TEXT PRIMARY KEY,
+    ewm_num REAL NOT NULL,
+    ewm_den REAL NOT NULL,
+    risk REAL NOT NULL,
+    last_ts REAL NOT NULL,
+    n_predictions INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS risk_events (
+    user_hash TEXT NOT NULL,
+    ts REAL NOT NULL,
+    risk REAL NOT NULL,
+    delta REAL NOT NULL
+);
+-- Covering index for time-window scans: top_risers never touches the table itself.
+CREATE INDEX IF NOT EXISTS risk_events_ts ON risk_events (ts, user_hash, delta);
+"""
+
+
+def _epoch(timestamp) -> float:
+    if timestamp is None:
+        return time.time()
+    if isinstance(timestamp, (int, float)):
+        return float(timestamp)
+    ts = pd.Timestamp(timestamp)
+    if ts.tzinfo is None:
+        ts = ts.tz_localize("UTC")
+    return ts.timestamp()
+
+
+class UserRiskStore:
+    """Per-user rolling risk persisted in SQLite, keyed by the hashed user id.
+
+    Each user row holds the running numerator/denominator of an ``adjust=True`` EWM (the same
+    smoothing as ``analysis.temporal_trend``), so a new prediction updates it in O(1). Every update
+    also appends (ts, risk, delta) to an event table indexed by time; the risk rise over a window is
+    the sum of deltas inside it. WAL mode plus ``BEGIN IMMEDIATE`` make concurrent writers from
+    several threads or processes serialize instead of failing.
+
+    Events older than ``retention_days`` are pruned when the store is opened and again every
+    ``prune_every`` updates, so the event table and the window scans in ``top_risers`` stay bounded.
+    """
+
+    def __init__(
+        self,
+        path: Path = USER_STATE_PATH,
+        span: int = 3,
+        timeout: float = 30.0,
+        retention_days: float = USER_EVENT_RETENTION_DAYS,
+        prune_every: int = 1000,
+    ):
+        self.path = Path(path)
+        self.decay = 1.0 - 2.0 / (span + 1)
+        self.timeout = timeout
+        self.retention_days = retention_days
+        self.prune_every = prune_every
+        self._local = threading.local()
+        self._writes = 0
+        self._writes_lock = threading.Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._connection().executescript(SCHEMA)
+        self.prune_events()
+
+    def _connection(self) -> sqlite3.Connection:
+        # sqlite3 connections are per thread; Streamlit runs every session on its own thread.
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.path), timeout=self.timeout, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(f"PRAGMA busy_timeout={int(self.timeout * 1000)}")
+            self._local.conn = conn
+        return conn
+
+    def update(self, user_hash: str, score: float, timestamp=None) -> Dict[str, float]:
+        """Fold one prediction's at-risk probability into the user's EWM; returns the new rolling risk and its change."""
+        ts = _epoch(timestamp)
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT ewm_num, ewm_den, risk, n_predictions FROM user_risk WHERE user_hash = ?", (user_hash,)
+            ).fetchone()
+            if row is None:
+                num, den, delta, n = score, 1.0, 0.0, 1
+                risk = score
+            else:
+                num = score + self.decay * row[0]
+                den = 1.0 + self.decay * row[1]
+                risk = num / den
+                delta, n = risk - row[2], row[3] + 1
+            conn.execute(
+                "INSERT INTO user_risk (user_hash, ewm_num, ewm_den, risk, last_ts, n_predictions) VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(user_hash) DO UPDATE SET ewm_num = excluded.ewm_num, ewm_den = excluded.ewm_den, "
+                "risk = excluded.risk, last_ts = MAX(last_ts, excluded.last_ts), n_predictions = excluded.n_predictions",
+                (user_hash, num, den, risk, ts, n),
+            )
+            conn.execute("INSERT INTO risk_events (user_hash, ts, risk, delta) VALUES (?, ?, ?, ?)", (user_hash, ts, risk, delta))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        with self._writes_lock:
+            self._writes += 1
+            due = self._writes % self.prune_every == 0
+        if due:
+            self.prune_events()
+        return {"risk": risk, "delta": delta, "n_predictions": n}
+
+    def get(self, user_hash: str) -> Optional[Dict[str, object]]:
+        row = self._connection().execute(
+            "SELECT risk, last_ts, n_predictions FROM user_risk WHERE user_hash = ?", (user_hash,)
+        ).fetchone()
+        if row is None:
+            return None
+        return {"risk": row[0], "last_seen": datetime.fromtimestamp(row[1], timezone.utc), "n_predictions": row[2]}
+
+    def top_risers(self, days: float = 7.0, limit: int = 10, now=None) -> pd.DataFrame:
+        """Users whose rolling risk rose most over the last ``days`` days, with their current risk.
+
+        Windows longer than ``retention_days`` only see the retained events.
+        """
+        since = _epoch(now) - days * 86400
+        rows = self._connection().execute(
+            "SELECT e.user_hash, e.rise, u.risk, u.last_ts FROM ("
+            "  SELECT user_hash, SUM(delta) AS rise FROM risk_events WHERE ts >= ? GROUP BY user_hash"
+            ") AS e JOIN user_risk AS u USING (user_hash) WHERE e.rise > 0 ORDER BY e.rise DESC LIMIT ?",
+            (since, limit),
+        ).fetchall()
+        frame = pd.DataFrame(rows, columns=["user_hash", "risk_rise", "risk", "last_seen"])
+        frame["last_seen"] = pd.to_datetime(frame["last_seen"], unit="s", utc=True)
+        return frame
+
+    def prune_events(self, older_than_days: Optional[float] = None, now=None) -> int:
+        """Drop events older than ``older_than_days`` (default ``retention_days``); per-user state is unaffected."""
+        days = self.retention_days if older_than_days is None else older_than_days
+        cursor = self._connection().execute("DELETE FROM risk_events WHERE ts < ?", (_epoch(now) - days * 86400,))
+        return cursor.rowcount
+
+
+_STORE: Optional[UserRiskStore] = None
+_STORE_LOCK = threading.Lock()
+
+
+def get_user_store() -> UserRiskStore:
+    global _STORE
+    with _STORE_LOCK:
+        if _STORE is None:
+            _STORE = UserRiskStore()
+        return _STORE
@@ -1,14 +1,22 @@
 import argparse
 import json
 
-import nltk
+import numpy as np
 import pandas as pd
 
 from src.analysis import fairness_analysis, shap_top_tokens, temporal_trend
-from src.config import GROUP_COLUMN, LABEL_COLUMN, TEXT_COLUMN
-from src.modeling import evaluate_model, load_baseline, prepare_features, train_baseline
+from src.config import DUPLICATE_GROUP_COLUMN, FEATURE_CACHE_DIR, FEATURE_MEANS_PATH, GROUP_COLUMN, LABEL_COLUMN, TEXT_COLUMN
+from src.dedup import DEDUP_THRESHOLD, drop_near_duplicates, duplicate_groups
+from src.drift import drift_columns, reference_profile, save_transformer_reference
+from src.feature_store import FeatureStore, cached_features, cached_preprocess, cached_training_features
+from src.incremental import train_baseline_incremental
+from src.inference import predict_transformer
+from src.modeling import class_probabilities, evaluate_model, load_baseline, prepare_features, train_baseline
 from src.preprocess import preprocess_frame, split_dataset
-from src.transformer_pipeline import fine_tune_transformer
+from src.registry import get_transformer
+from src.sentiment import ensure_vader_lexicon
+from src.sweep import run_sweep
+from src.transformer_backends import BACKENDS, backend_parity, export_onnx
 
 
 def parse_args():
@@ -16,34 +24,117 @@ def parse_args():
     p.add_argument("--data", required=True, help="Path to labeled csv with text,label columns")
     p.add_argument("--baseline", choices=["logreg", "svm"], default="logreg")
     p.add_argument("--train-transformer", action="store_true")
+    p.add_argument("--fixed-padding", action="store_true", help="Pad every transformer example to max length")
+    p.add_argument("--transformer-lr", type=float, default=2e-5, help="Fine-tuning learning rate")
+    p.add_argument("--transformer-epochs", type=float, default=2, help="Fine-tuning epochs")
+    p.add_argument(
+        "--export-onnx",
+        action="store_true",
+        help="Export the transformer to ONNX (FP32 + int8) and report backend parity on the validation split",
+    )
+    p.add_argument(
+        "--out-of-core",
+        action="store_true",
+        help="Stream the CSV in chunks into a hashed-feature SGD baseline instead of fitting TF-IDF in memory",
+    )
+    p.add_argument("--chunk-size", type=int, default=100000, help="Rows per chunk in --out-of-core mode")
     p.add_argument("--output", default="mental_health_risk_app/artifacts/metrics.json")
+    p.add_argument("--feature-cache-dir", default=str(FEATURE_CACHE_DIR))
+    p.add_argument("--no-feature-cache", action="store_true", help="Always recompute preprocessing and features")
+    p.add_argument(
+        "--sweep",
+        action="store_true",
+        help="Grid-search vectorizer configs and (model type, C, class weight) on the validation split; keep the best",
+    )
+    p.add_argument("--sweep-jobs", type=int, default=None, help="Worker processes for --sweep (default: all CPUs)")
+    p.add_argument(
+        "--dedup",
+        choices=["none", "drop", "group"],
+        default="none",
+        help="Near-duplicate handling: drop all but the first copy, or keep copies together in one split",
+    )
+    p.add_argument("--dedup-threshold", type=float, default=DEDUP_THRESHOLD, help="Estimated Jaccard similarity of near-duplicates")
+    p.add_argument(
+        "--calibrate-cascade",
+        action="store_true",
+        help="Calibrate the baseline->transformer cascade band on the validation split (implied by --train-transformer)",
+    )
+    p.add_argument("--cascade-backend", choices=BACKENDS, default="pytorch", help="Transformer runtime used by the cascade")
     return p.parse_args()
 
 
-def main():
-    args = parse_args()
-    nltk.download("vader_lexicon", quiet=True)
-
-    df = pd.read_csv(args.data)
-    df = preprocess_frame(df)
-    bundle = split_dataset(df)
+def read_training_data(path: str, dedup: str = "none", threshold: float = DEDUP_THRESHOLD) -> pd.DataFrame:
+    df = pd.read_csv(path)
+    if dedup == "drop":
+        n_rows = len(df)
+        df = drop_near_duplicates(df, threshold=threshold)
+        print(f"Dedup: dropped {n_rows - len(df)} near-duplicate rows of {n_rows}")
+    elif dedup == "group":
+        df[DUPLICATE_GROUP_COLUMN] = duplicate_groups(df[TEXT_COLUMN], threshold=threshold)
+        print(f"Dedup: {df[DUPLICATE_GROUP_COLUMN].nunique()} near-duplicate groups in {len(df)} rows")
+    return preprocess_frame(df)
 
-    model, vectorizer = train_baseline(bundle.train, args.baseline)
-    metrics = evaluate_model(model, vectorizer, bundle.test)
 
-    x_test = prepare_features(bundle.test, vectorizer, fit=False)
-    y_pred = model.predict(x_test)
-    fairness = fairness_analysis(bundle.test[LABEL_COLUMN].values, y_pred, bundle.test[GROUP_COLUMN])
-    shap_terms = shap_top_tokens(model, vectorizer, bundle.test)
-
-    if hasattr(model, "predict_proba"):
-        risk_scores = model.predict_proba(x_test)
-        risk_series = risk_scores[:, 1] if risk_scores.shape[1] == 2 else risk_scores.max(axis=1)
+def main():
+    args = parse_args()
+    ensure_vader_lexicon()
+
+    if args.out_of_core:
+        if args.train_transformer or args.export_onnx or args.sweep or args.calibrate_cascade or args.dedup != "none":
+            raise SystemExit(
+                "--out-of-core trains the hashed linear baseline only; "
+                "drop --train-transformer/--export-onnx/--sweep/--calibrate-cascade/--dedup"
+            )
+        result = train_baseline_incremental(args.data, chunk_size=args.chunk_size)
+        model, vectorizer, eval_df = result.model, result.vectorizer, result.holdout
+        held_out = set(eval_df[LABEL_COLUMN]) if not eval_df.empty else set()
+        missing = [label for label in model.classes_ if label not in held_out]
+        if missing:
+            # ROC AUC (and per-class metrics) need every trained class among the evaluation rows.
+            raise SystemExit(
+                f"Trained incrementally on {result.rows_trained} rows and saved the model, but the {len(eval_df)} "
+                f"held-out rows contain no {', '.join(map(str, missing))} examples; the input is too small to "
+                "evaluate, use a larger CSV"
+            )
+        x_eval = prepare_features(eval_df, vectorizer, fit=False)
+        print(f"Trained incrementally on {result.rows_trained} rows; evaluating on {len(eval_df)} held-out rows")
     else:
-        decision = model.decision_function(x_test)
-        risk_series = 1 / (1 + pow(2.71828, -decision))
-
-    temporal = temporal_trend(bundle.test, risk_series)
+        store = FeatureStore(args.feature_cache_dir, enabled=not args.no_feature_cache)
+        dedup_options = {"dedup": args.dedup, "threshold": args.dedup_threshold} if args.dedup != "none" else None
+        data_key, df = cached_preprocess(
+            store, args.data, lambda: read_training_data(args.data, args.dedup, args.dedup_threshold), options=dedup_options
+        )
+        bundle = split_dataset(df, groups=DUPLICATE_GROUP_COLUMN if args.dedup == "group" else None)
+
+        if args.sweep:
+            sweep = run_sweep(bundle.train, bundle.val, n_jobs=args.sweep_jobs, store=store, data_key=data_key)
+            best = sweep.best
+            print(
+                f"Sweep: {len(sweep.trials)} trials, best val F1 {best['val_f1']:.4f} "
+                f"({best['model_type']}, C={best['C']}, class_weight={best['class_weight']}, vectorizer {best['vectorizer']})"
+            )
+            vectorizer_params = sweep.vectorizers[best["vectorizer"]]["params"]
+            model_params = {"model_type": best["model_type"], "C": best["C"], "class_weight": best["class_weight"]}
+        else:
+            vectorizer_params, model_params = {}, {"model_type": args.baseline}
+
+        vectorizer, x_train = cached_training_features(store, data_key, bundle.train, vectorizer_params)
+        x_val = cached_features(store, data_key, "val", bundle.val, vectorizer)
+        model, vectorizer = train_baseline(
+            bundle.train, vectorizer=vectorizer, x_train=x_train, df_val=bundle.val, x_val=x_val, **model_params
+        )
+        eval_df = bundle.test
+        x_eval = cached_features(store, data_key, "test", eval_df, vectorizer)
+
+    metrics = evaluate_model(model, vectorizer, eval_df, x_eval=x_eval)
+    risk_scores = class_probabilities(model, x_eval)
+    y_pred = model.classes_[risk_scores.argmax(axis=1)]
+    fairness = fairness_analysis(eval_df[LABEL_COLUMN].values, y_pred, eval_df[GROUP_COLUMN])
+    shap_terms = shap_top_tokens(model, vectorizer, eval_df, features=x_eval, background=np.load(FEATURE_MEANS_PATH))
+
+    risk_series = risk_scores[:, 1] if risk_scores.shape[1] == 2 else risk_scores.max(axis=1)
+
+    temporal = temporal_trend(eval_df, risk_series)
 
     output = {
         "baseline_metrics": metrics,
@@ -52,15 +143,46 @@ def main():
         "temporal_preview": temporal.head(20).to_dict(orient="records"),
         "ethics_disclaimer": "Not a diagnostic tool. Use only for supportive triage and human review.",
     }
+    if args.sweep:
+        output["sweep"] = {"best": sweep.best, "vectorizers": sweep.vectorizers, "trials": sweep.trials}
 
     if args.train_transformer:
+        # Imported here so baseline-only runs never load datasets/transformers.
+        from src.transformer_pipeline import fine_tune_transformer
+
         labels = sorted(df[LABEL_COLUMN].unique().tolist())
         label2id = {k: i for i, k in enumerate(labels)}
-        fine_tune_transformer(bundle.train.copy(), bundle.val.copy(), label2id)
+        fine_tune_transformer(
+            bundle.train,
+            bundle.val,
+            label2id,
+            dynamic_padding=not args.fixed_padding,
+            store=store,
+            learning_rate=args.transformer_lr,
+            num_train_epochs=args.transformer_epochs,
+        )
         output["transformer"] = "fine_tuned"
+        tokenizer, transformer = get_transformer()
+        _, val_scores = predict_transformer(tokenizer, transformer, bundle.val[TEXT_COLUMN].tolist())
+        save_transformer_reference(reference_profile(drift_columns(bundle.val, val_scores)))
+
+    if args.export_onnx:
+        export_onnx()
+        output["transformer_backends"] = backend_parity(bundle.val[TEXT_COLUMN].tolist(), bundle.val[LABEL_COLUMN].to_numpy())
+
+    if args.train_transformer or args.calibrate_cascade:
+        from src.cascade import calibrate_on_split
+
+        cascade = calibrate_on_split(bundle.val, bundle.val[LABEL_COLUMN].to_numpy(), backend=args.cascade_backend)
+        output["cascade"] = cascade
+        print(
+            f"Cascade band {cascade['band']:.3f} around {cascade['threshold']:.2f}: {cascade['escalation_rate']:.1%} escalated, "
+            f"val F1 {cascade['f1']:.4f} (transformer {cascade['transformer_f1']:.4f}), "
+            f"~{cascade['latency_savings']:.0%} latency saved"
+        )
 
     with open(args.output, "w", encoding="utf-8") as f:
-        json.dump(output, f, indent=2)
+        json.dump(output, f, indent=2, default=str)
     print(f"Training complete. Metrics saved to {args.output}")
 
 